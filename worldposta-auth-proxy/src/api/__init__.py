@@ -1,5 +1,11 @@
 # WorldPosta API Client
 from .worldposta_client import WorldPostaClient
-from .signing import generate_signature, generate_nonce
+from .signing import check_crypto_backend, create_signer, generate_signature, generate_nonce
 
-__all__ = ["WorldPostaClient", "generate_signature", "generate_nonce"]
+__all__ = [
+    "WorldPostaClient",
+    "check_crypto_backend",
+    "create_signer",
+    "generate_signature",
+    "generate_nonce",
+]
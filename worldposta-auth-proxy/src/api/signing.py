@@ -3,10 +3,37 @@ WorldPosta Authentication Proxy - Request Signing
 HMAC-SHA256 signature generation for API authentication
 """
 
+import os
+import ssl
 import hmac
 import hashlib
-import secrets
 import time
+import logging
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Oldest OpenSSL with SHA extension (SHA-NI / ARMv8 SHA2) code paths
+MIN_OPENSSL_VERSION = (1, 1, 1)
+
+
+def create_signer(secret_key: Union[str, bytes]) -> "hmac.HMAC":
+    """
+    Create a keyed HMAC-SHA256 object for repeated signing
+
+    The key padding and first compression block are computed once here;
+    generate_signature() copies the object for each request instead of
+    re-keying from scratch.
+
+    Args:
+        secret_key: Integration secret key
+
+    Returns:
+        HMAC object with no message data
+    """
+    if isinstance(secret_key, str):
+        secret_key = secret_key.encode("utf-8")
+    return hmac.new(secret_key, digestmod=hashlib.sha256)
 
 
 def generate_nonce(length: int = 32) -> str:
@@ -19,10 +46,15 @@ def generate_nonce(length: int = 32) -> str:
     Returns:
         Random hex string
     """
-    return secrets.token_hex(length // 2)
+    return os.urandom(length // 2).hex()
 
 
-def generate_signature(secret_key: str, timestamp: int, nonce: str, body: str) -> str:
+def generate_signature(
+    secret_key: Union[str, bytes, "hmac.HMAC"],
+    timestamp: int,
+    nonce: str,
+    body: Union[str, bytes]
+) -> str:
     """
     Generate HMAC-SHA256 signature for API request
 
@@ -30,30 +62,36 @@ def generate_signature(secret_key: str, timestamp: int, nonce: str, body: str) -
         HMAC-SHA256(secret_key, timestamp + nonce + body)
 
     Args:
-        secret_key: Integration secret key
+        secret_key: Integration secret key, or a signer from create_signer()
         timestamp: Unix timestamp
         nonce: Random nonce string
-        body: Request body (JSON string)
+        body: Request body (JSON string, or its UTF-8 encoded bytes)
 
     Returns:
         Hex-encoded signature
     """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
     # Build signing string: timestamp + nonce + body
-    data_to_sign = f"{timestamp}{nonce}{body}"
+    data_to_sign = b"%d%s%s" % (timestamp, nonce.encode("utf-8"), body)
 
-    # Compute HMAC-SHA256
-    signature = hmac.new(
-        key=secret_key.encode("utf-8"),
-        msg=data_to_sign.encode("utf-8"),
-        digestmod=hashlib.sha256
-    ).hexdigest()
+    # Pre-keyed signer: clone it rather than re-deriving the key pads
+    if isinstance(secret_key, hmac.HMAC):
+        signer = secret_key.copy()
+        signer.update(data_to_sign)
+        return signer.digest().hex()
 
-    return signature
+    if isinstance(secret_key, str):
+        secret_key = secret_key.encode("utf-8")
+
+    # Compute HMAC-SHA256 (one-shot C implementation, no HMAC object)
+    return hmac.digest(secret_key, data_to_sign, "sha256").hex()
 
 
 def get_auth_headers(
     integration_key: str,
-    secret_key: str,
+    secret_key: Union[str, bytes, "hmac.HMAC"],
     body: str = "{}"
 ) -> dict:
     """
@@ -61,7 +99,7 @@ def get_auth_headers(
 
     Args:
         integration_key: Integration key
-        secret_key: Secret key
+        secret_key: Secret key, or a signer from create_signer()
         body: Request body (use "{}" for GET requests)
 
     Returns:
@@ -78,3 +116,40 @@ def get_auth_headers(
         "X-Timestamp": str(timestamp),
         "X-Nonce": nonce,
     }
+
+
+def _cpu_has_sha_extensions() -> Optional[bool]:
+    """Check /proc/cpuinfo for SHA instruction support (None if unknown)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    flags = line.split(":", 1)[1].split()
+                    return "sha_ni" in flags or "sha2" in flags
+    except OSError:
+        pass
+    return None
+
+
+def check_crypto_backend():
+    """
+    Log the HMAC-SHA256 backend in use
+
+    Signing relies on hashlib's OpenSSL implementation, which uses the
+    CPU's SHA instructions when available. Warns if hashlib is not backed
+    by OpenSSL or the OpenSSL build is too old to use them.
+    """
+    openssl_backed = hashlib.sha256.__name__.startswith("openssl_")
+    sha_ext = _cpu_has_sha_extensions()
+    logger.info(
+        f"Signing backend: {ssl.OPENSSL_VERSION if openssl_backed else 'builtin hashlib'}, "
+        f"CPU SHA extensions: {'unknown' if sha_ext is None else 'yes' if sha_ext else 'no'}"
+    )
+
+    if not openssl_backed:
+        logger.warning("hashlib is not using OpenSSL; request signing will be slower")
+    elif ssl.OPENSSL_VERSION_INFO[:3] < MIN_OPENSSL_VERSION:
+        logger.warning(
+            f"{ssl.OPENSSL_VERSION} is older than OpenSSL "
+            f"{'.'.join(map(str, MIN_OPENSSL_VERSION))}; upgrade for faster SHA-256"
+        )
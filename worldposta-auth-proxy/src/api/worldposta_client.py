@@ -10,9 +10,28 @@ import asyncio
 from typing import Optional, Tuple
 from enum import Enum
 
-import aiohttp
+import httpx
 
-from .signing import get_auth_headers
+from .signing import create_signer, generate_nonce, generate_signature
+
+try:
+    import orjson
+
+    def _dump_body(body: dict) -> bytes:
+        """Serialize request body to compact JSON bytes"""
+        return orjson.dumps(body)
+
+    def _load_body(raw: bytes):
+        """Parse JSON response bytes (raises ValueError if invalid)"""
+        return orjson.loads(raw)
+except ImportError:
+    def _dump_body(body: dict) -> bytes:
+        """Serialize request body to compact JSON bytes"""
+        return json.dumps(body, separators=(',', ':')).encode("utf-8")
+
+    def _load_body(raw: bytes):
+        """Parse JSON response bytes (raises ValueError if invalid)"""
+        return json.loads(raw)
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +45,15 @@ class PushStatus(Enum):
     ERROR = "error"
 
 
+# API status string -> PushStatus (anything else is treated as an error)
+_STATUS_MAP = {
+    "approved": PushStatus.APPROVED,
+    "denied": PushStatus.DENIED,
+    "expired": PushStatus.EXPIRED,
+    "pending": PushStatus.PENDING,
+}
+
+
 class WorldPostaClient:
     """
     WorldPosta API client for 2FA operations
@@ -36,26 +64,49 @@ class WorldPostaClient:
         endpoint: str,
         integration_key: str,
         secret_key: str,
-        timeout: int = 60
+        timeout: int = 60,
+        http_client: Optional[httpx.AsyncClient] = None
     ):
         self.endpoint = endpoint.rstrip("/")
         self.integration_key = integration_key
         self.secret_key = secret_key
+        self._signer = create_signer(secret_key)
+        # Headers that are identical for every request, as (name, value)
+        # pairs so per-request headers are a single tuple concatenation
+        self._static_header_items = (
+            ("Content-Type", "application/json"),
+            ("X-Integration-Key", integration_key),
+        )
         self.timeout = timeout
-        self._session: Optional[aiohttp.ClientSession] = None
-
-    async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session"""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=self.timeout)
+        # An injected client is shared with the caller, who is responsible
+        # for closing it
+        self._client: Optional[httpx.AsyncClient] = http_client
+        self._owns_client = http_client is None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Get or create HTTP client"""
+        if self._client is None:
+            # HTTP/2 multiplexes concurrent requests (e.g. push status polls)
+            # over one pooled TLS connection and compresses the repeated
+            # auth headers; falls back to HTTP/1.1 if the server lacks h2
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=75
+                )
             )
-        return self._session
+        return self._client
 
     async def close(self):
-        """Close the HTTP session"""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """Close the HTTP client"""
+        if not self._owns_client:
+            return
+        client, self._client = self._client, None
+        if client and not client.is_closed:
+            await client.aclose()
 
     async def _request(
         self,
@@ -75,39 +126,43 @@ class WorldPostaClient:
             Tuple of (success, response_data)
         """
         url = f"{self.endpoint}{path}"
-        # Use compact JSON (no spaces) to match signature format
-        body_str = json.dumps(body, separators=(',', ':')) if body else "{}"
-        headers = get_auth_headers(self.integration_key, self.secret_key, body_str)
+        # Use compact JSON (no spaces) to match signature format; the same
+        # bytes are signed and sent
+        body_bytes = _dump_body(body) if body else b"{}"
+
+        # Sign request: only signature, timestamp and nonce vary per call
+        timestamp = int(time.time())
+        nonce = generate_nonce()
+        headers = self._static_header_items + (
+            ("X-Signature", generate_signature(self._signer, timestamp, nonce, body_bytes)),
+            ("X-Timestamp", str(timestamp)),
+            ("X-Nonce", nonce),
+        )
 
         logger.debug(f"API request: {method} {url}")
-        logger.debug(f"Request body: {body_str}")
+        logger.debug("Request body: %s", body_bytes)
 
         try:
-            session = await self._get_session()
+            client = await self._get_client()
 
             if method.upper() == "GET":
-                async with session.get(url, headers=headers) as response:
-                    response_text = await response.text()
-                    logger.debug(f"Response status: {response.status}, body: {response_text}")
-                    try:
-                        data = json.loads(response_text) if response_text else {}
-                    except json.JSONDecodeError:
-                        data = {"raw": response_text}
-                    return response.status < 300, data
+                response = await client.get(url, headers=headers)
             else:
-                async with session.post(url, headers=headers, data=body_str) as response:
-                    response_text = await response.text()
-                    logger.debug(f"Response status: {response.status}, body: {response_text}")
-                    try:
-                        data = json.loads(response_text) if response_text else {}
-                    except json.JSONDecodeError:
-                        data = {"raw": response_text}
-                    return response.status < 300, data
-
-        except asyncio.TimeoutError:
+                response = await client.post(url, headers=headers, content=body_bytes)
+
+            # Parse the raw bytes directly, skipping the text decode
+            raw = response.content
+            logger.debug("Response status: %s, body: %s", response.status_code, raw)
+            try:
+                data = _load_body(raw) if raw else {}
+            except ValueError:
+                data = {"raw": raw.decode("utf-8", "replace")}
+            return response.status_code < 300, data
+
+        except httpx.TimeoutException:
             logger.error(f"Request timeout: {method} {path}")
             return False, {"error": "timeout"}
-        except aiohttp.ClientError as e:
+        except httpx.HTTPError as e:
             logger.error(f"Request failed: {method} {path} - {e}")
             return False, {"error": str(e)}
         except Exception as e:
@@ -194,41 +249,39 @@ class WorldPostaClient:
             return PushStatus.ERROR
 
         status = data.get("status", "").lower()
-
-        if status == "approved":
-            return PushStatus.APPROVED
-        elif status == "denied":
-            return PushStatus.DENIED
-        elif status == "expired":
-            return PushStatus.EXPIRED
-        elif status == "pending":
-            return PushStatus.PENDING
-        else:
-            return PushStatus.ERROR
+        return _STATUS_MAP.get(status, PushStatus.ERROR)
 
     async def wait_for_push(
         self,
         request_id: str,
         timeout: Optional[int] = None,
-        poll_interval: float = 0.5
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 2.0
     ) -> PushStatus:
         """
         Wait for push notification to be approved/denied
 
+        The delay between status checks starts at poll_interval and grows
+        by 1.5x per check up to max_poll_interval, so quick approvals are
+        still picked up promptly while slow ones cost far fewer requests.
+
         Args:
             request_id: Push request ID
             timeout: Maximum wait time in seconds (default: self.timeout)
-            poll_interval: Time between status checks in seconds
+            poll_interval: Initial time between status checks in seconds
+            max_poll_interval: Upper bound for time between status checks
 
         Returns:
             Final PushStatus
         """
         timeout = timeout or self.timeout
-        start_time = time.time()
+        # Monotonic clock: unaffected by NTP steps or wall-clock changes
+        deadline = time.monotonic() + timeout
+        attempt = 0
 
         logger.debug(f"Waiting for push {request_id} (timeout: {timeout}s)")
 
-        while (time.time() - start_time) < timeout:
+        while time.monotonic() < deadline:
             status = await self.check_push_status(request_id)
 
             if status == PushStatus.APPROVED:
@@ -242,7 +295,8 @@ class WorldPostaClient:
                 # Continue polling on transient errors
                 pass
 
-            await asyncio.sleep(poll_interval)
+            await asyncio.sleep(min(max_poll_interval, poll_interval * (1.5 ** attempt)))
+            attempt += 1
 
         logger.warning(f"Push {request_id} timed out after {timeout}s")
         return PushStatus.EXPIRED
@@ -3,14 +3,34 @@ WorldPosta Authentication Proxy - Active Directory Client
 Handles primary authentication against AD/LDAP
 """
 
+import re
+import time
 import logging
-from typing import Optional, Tuple
+import threading
+from typing import Dict, Optional, Tuple
 from ldap3 import Server, Connection, ALL, SUBTREE, SIMPLE
+from ldap3.core.exceptions import LDAPCommunicationError, LDAPException
+from ldap3.core.results import RESULT_INVALID_CREDENTIALS
 
 from ..config import ADClientConfig
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on cached username -> DN entries before expired ones are purged
+DN_CACHE_MAX_ENTRIES = 4096
+
+# AD reports the reason for a failed bind as "data <hex>" in the
+# diagnostic message, e.g. "... AcceptSecurityContext error, data 775, v4563"
+_AD_SUBCODE_RE = re.compile(r"data ([0-9a-fA-F]+)")
+
+_AD_BIND_ERRORS = {
+    0x525: "Invalid username",
+    0x52E: "Invalid password",
+    0x533: "Account disabled",
+    0x701: "Account expired",
+    0x775: "Account locked",
+}
+
 
 class ADClient:
     """
@@ -20,6 +40,15 @@ class ADClient:
     def __init__(self, config: ADClientConfig):
         self.config = config
         self._server: Optional[Server] = None
+        # username -> (DN, lookup time); only skips the directory search,
+        # the user bind in authenticate() still verifies the password
+        self._dn_cache: Dict[str, Tuple[str, float]] = {}
+        # Lookups run on executor / Twisted pool threads concurrently; kept
+        # separate from _svc_lock so cache hits don't wait on AD searches
+        self._dn_cache_lock = threading.Lock()
+        # Long-lived service-account connection used for DN lookups
+        self._svc_conn: Optional[Connection] = None
+        self._svc_lock = threading.Lock()
 
     def _get_server(self) -> Server:
         """Get or create LDAP server connection"""
@@ -32,55 +61,110 @@ class ADClient:
             )
         return self._server
 
-    def _get_user_dn(self, username: str) -> Optional[str]:
+    def _get_service_conn(self) -> Connection:
         """
-        Look up user's DN from username
-
-        Args:
-            username: Username to look up
+        Get or create the bound service-account connection
 
-        Returns:
-            User's DN or None if not found
+        The connection is kept open between lookups and re-created if it
+        has been closed. Callers must hold self._svc_lock.
         """
-        server = self._get_server()
-
-        try:
-            # Connect with service account
-            conn = Connection(
-                server,
+        if self._svc_conn is None or self._svc_conn.closed:
+            self._svc_conn = Connection(
+                self._get_server(),
                 user=self.config.bind_dn,
                 password=self.config.bind_password,
                 authentication=SIMPLE,
                 auto_bind=True
             )
+        return self._svc_conn
 
-            # Build search filter
-            search_filter = self.config.search_filter.format(username=username)
+    def _reset_service_conn(self):
+        """Drop the service-account connection so the next lookup rebinds"""
+        conn, self._svc_conn = self._svc_conn, None
+        if conn is not None:
+            try:
+                conn.unbind()
+            except Exception:
+                pass
 
-            # Search for user
+    def _search_user(self, search_filter: str) -> list:
+        """Run a user search on the service connection (holding _svc_lock)"""
+        conn = self._get_service_conn()
+        try:
             conn.search(
                 search_base=self.config.base_dn,
                 search_filter=search_filter,
                 search_scope=SUBTREE,
                 attributes=["distinguishedName"]
             )
+            return conn.entries
+        except Exception:
+            self._reset_service_conn()
+            raise
 
-            if len(conn.entries) == 1:
-                user_dn = str(conn.entries[0].distinguishedName)
-                conn.unbind()
+    def _get_user_dn(self, username: str) -> Optional[str]:
+        """
+        Look up user's DN from username
+
+        Args:
+            username: Username to look up
+
+        Returns:
+            User's DN or None if not found
+        """
+        ttl = self.config.dn_cache_ttl
+        if ttl > 0:
+            with self._dn_cache_lock:
+                cached = self._dn_cache.get(username)
+            if cached and time.monotonic() - cached[1] < ttl:
+                return cached[0]
+
+        # Build search filter
+        search_filter = self.config.search_filter.format(username=username)
+
+        try:
+            with self._svc_lock:
+                reused = self._svc_conn is not None
+                try:
+                    entries = self._search_user(search_filter)
+                except LDAPCommunicationError:
+                    if not reused:
+                        raise
+                    # Pooled connection went stale (AD restart, idle timeout);
+                    # reconnect once before giving up
+                    logger.debug("Service connection lost, reconnecting")
+                    entries = self._search_user(search_filter)
+
+            if len(entries) == 1:
+                user_dn = str(entries[0].distinguishedName)
+                if ttl > 0:
+                    self._cache_dn(username, user_dn)
                 return user_dn
-            elif len(conn.entries) > 1:
+            elif len(entries) > 1:
                 logger.warning(f"Multiple users found for username: {username}")
             else:
                 logger.debug(f"User not found: {username}")
 
-            conn.unbind()
             return None
 
         except Exception as e:
             logger.error(f"Error looking up user {username}: {e}")
             return None
 
+    def _cache_dn(self, username: str, user_dn: str):
+        """Store a DN lookup result, purging expired entries when full"""
+        now = time.monotonic()
+        with self._dn_cache_lock:
+            if len(self._dn_cache) >= DN_CACHE_MAX_ENTRIES:
+                ttl = self.config.dn_cache_ttl
+                self._dn_cache = {
+                    name: entry for name, entry in self._dn_cache.items()
+                    if now - entry[1] < ttl
+                }
+                if len(self._dn_cache) >= DN_CACHE_MAX_ENTRIES:
+                    self._dn_cache.clear()
+            self._dn_cache[username] = (user_dn, now)
+
     def authenticate(self, username: str, password: str) -> Tuple[bool, str]:
         """
         Authenticate user against Active Directory
@@ -108,35 +192,46 @@ class ADClient:
         # Try to bind as the user
         server = self._get_server()
 
+        conn = Connection(
+            server,
+            user=user_dn,
+            password=password,
+            authentication=SIMPLE
+        )
+
         try:
-            conn = Connection(
-                server,
-                user=user_dn,
-                password=password,
-                authentication=SIMPLE,
-                auto_bind=True
-            )
+            bound = conn.bind()
+            result = conn.result or {}
+        except LDAPException as e:
+            logger.warning(f"Primary auth failed for user {username}: {e}")
+            return False, "Authentication failed"
+        finally:
             conn.unbind()
+
+        if bound:
             logger.info(f"Primary auth successful for user: {username}")
             return True, "Authentication successful"
 
-        except Exception as e:
-            error_msg = str(e)
-            logger.warning(f"Primary auth failed for user {username}: {error_msg}")
-
-            # Parse common AD errors
-            if "invalidCredentials" in error_msg:
-                return False, "Invalid password"
-            elif "user name is invalid" in error_msg.lower():
-                return False, "Invalid username"
-            elif "account disabled" in error_msg.lower():
-                return False, "Account disabled"
-            elif "account expired" in error_msg.lower():
-                return False, "Account expired"
-            elif "account locked" in error_msg.lower():
-                return False, "Account locked"
-            else:
-                return False, "Authentication failed"
+        message = result.get("message") or ""
+        logger.warning(
+            f"Primary auth failed for user {username}: "
+            f"{result.get('description')} {message}"
+        )
+
+        # Map AD's sub-error code first, then the LDAP result code
+        match = _AD_SUBCODE_RE.search(message)
+        if match:
+            reason = _AD_BIND_ERRORS.get(int(match.group(1), 16))
+            if reason:
+                return False, reason
+        if result.get("result") == RESULT_INVALID_CREDENTIALS:
+            return False, "Invalid password"
+        return False, "Authentication failed"
+
+    def close(self):
+        """Unbind the pooled service-account connection"""
+        with self._svc_lock:
+            self._reset_service_conn()
 
     def test_connection(self) -> bool:
         """
@@ -3,6 +3,7 @@ WorldPosta Authentication Proxy - Authentication Engine
 Orchestrates primary auth + 2FA
 """
 
+import re
 import logging
 import asyncio
 from typing import Optional, Tuple
@@ -10,10 +11,18 @@ from enum import Enum
 
 from .ad_client import ADClient
 from ..api import WorldPostaClient
+from ..api.worldposta_client import PushStatus
 from ..config import ADClientConfig, WorldPostaAPIConfig
 
 logger = logging.getLogger(__name__)
 
+# "<password>,push" or "<password>,<6-8 digit OTP>"; split on the last comma
+_FACTOR_RE = re.compile(r"^(.*),(?:(push)|([0-9]{6,8}))$", re.IGNORECASE | re.DOTALL)
+
+# Usernames end up in LDAP search filters; reject control characters and
+# filter metacharacters before doing any I/O
+_USERNAME_RE = re.compile(r"[^\x00-\x1f()*]{1,256}")
+
 
 class AuthResult(Enum):
     """Authentication result codes"""
@@ -36,20 +45,25 @@ class AuthEngine:
         self,
         ad_config: Optional[ADClientConfig],
         api_config: WorldPostaAPIConfig,
-        service_name: str = "Authentication"
+        service_name: str = "Authentication",
+        api_client: Optional[WorldPostaClient] = None
     ):
         self.ad_client = ADClient(ad_config) if ad_config else None
-        self.api_client = WorldPostaClient(
+        # Reuse a shared API client (and its connection pool) when given
+        self.api_client = api_client or WorldPostaClient(
             endpoint=api_config.endpoint,
             integration_key=api_config.integration_key,
             secret_key=api_config.secret_key,
             timeout=api_config.push_timeout
         )
         self.service_name = service_name
+        self.push_during_primary = api_config.push_during_primary
 
     async def close(self):
-        """Close API client session"""
+        """Close API client session and AD connections"""
         await self.api_client.close()
+        if self.ad_client:
+            self.ad_client.close()
 
     def _parse_password(self, password: str) -> Tuple[str, Optional[str]]:
         """
@@ -60,16 +74,20 @@ class AuthEngine:
         - "password,push" -> ("password", "push")
         - "password,123456" -> ("password", "123456")
 
+        Anything after the last comma that is not "push" or a 6-8 digit
+        code is treated as part of the password.
+
         Args:
             password: Password string potentially with appended factor
 
         Returns:
             Tuple of (real_password, factor)
         """
-        if "," in password:
-            parts = password.rsplit(",", 1)
-            return parts[0], parts[1]
-        return password, None
+        match = _FACTOR_RE.match(password)
+        if match is None:
+            return password, None
+        real_password, push, code = match.groups()
+        return real_password, "push" if push else code
 
     async def authenticate_primary(
         self,
@@ -87,7 +105,12 @@ class AuthEngine:
             Tuple of (success, message)
         """
         if self.ad_client:
-            return self.ad_client.authenticate(username, password)
+            # ldap3 is blocking; run the binds in a worker thread so other
+            # authentications (and push polls) keep running on the loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.ad_client.authenticate, username, password
+            )
         else:
             # No primary auth configured - pass-through mode
             logger.debug("No primary auth configured, skipping")
@@ -122,6 +145,21 @@ class AuthEngine:
         else:
             return AuthResult.PUSH_TIMEOUT
 
+    async def _finish_push(self, push_task: "asyncio.Task[Optional[str]]") -> AuthResult:
+        """
+        Wait for an already-started push send, then for the user's response
+
+        Args:
+            push_task: Task running api_client.send_push()
+
+        Returns:
+            AuthResult
+        """
+        request_id = await push_task
+        if request_id and await self.api_client.wait_for_push(request_id) == PushStatus.APPROVED:
+            return AuthResult.SUCCESS
+        return AuthResult.PUSH_TIMEOUT
+
     async def authenticate_otp(self, username: str, code: str) -> AuthResult:
         """
         Perform OTP-based 2FA
@@ -159,35 +197,60 @@ class AuthEngine:
         Returns:
             Tuple of (AuthResult, message)
         """
+        # Cheap rejections first, so probes never reach AD or the API
+        if not password:
+            return AuthResult.PRIMARY_FAILED, "Password required"
+        if not _USERNAME_RE.fullmatch(username):
+            logger.warning(f"Rejected malformed username: {username!r}")
+            return AuthResult.PRIMARY_FAILED, "Invalid username"
+
         logger.info(f"Starting authentication for user: {username} (mode: {mode})")
 
         # Parse password for appended factor
         real_password, factor = self._parse_password(password)
 
+        # Optionally send the push while AD is still checking the password,
+        # hiding the bind latency behind the API round-trip
+        push_task = None
+        if self.push_during_primary and self.ad_client and (
+            factor == "push" or (factor is None and mode != "otp")
+        ):
+            push_task = asyncio.create_task(self.api_client.send_push(
+                username=username,
+                service_name=self.service_name,
+                device_info=device_info,
+                ip_address=ip_address
+            ))
+
         # Primary authentication
-        primary_success, primary_msg = await self.authenticate_primary(
-            username, real_password
-        )
+        try:
+            primary_success, primary_msg = await self.authenticate_primary(
+                username, real_password
+            )
+        except BaseException:
+            if push_task:
+                push_task.cancel()
+            raise
 
         if not primary_success:
+            if push_task:
+                push_task.cancel()
             logger.warning(f"Primary auth failed for {username}: {primary_msg}")
             return AuthResult.PRIMARY_FAILED, primary_msg
 
         logger.debug(f"Primary auth successful for {username}")
 
         # Determine 2FA method
-        if factor:
-            # User specified factor
-            if factor.lower() == "push":
+        if push_task:
+            result = await self._finish_push(push_task)
+        elif factor:
+            # User specified factor (already validated by _parse_password)
+            if factor == "push":
                 result = await self.authenticate_push(
                     username, device_info, ip_address
                 )
-            elif factor.isdigit() and len(factor) >= 6:
-                # Looks like an OTP code
-                result = await self.authenticate_otp(username, factor)
             else:
-                logger.warning(f"Unknown factor: {factor}")
-                return AuthResult.ERROR, f"Unknown factor: {factor}"
+                result = await self.authenticate_otp(username, factor)
         elif mode == "push":
             result = await self.authenticate_push(
                 username, device_info, ip_address
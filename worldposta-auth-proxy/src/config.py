@@ -25,6 +25,9 @@ class WorldPostaAPIConfig:
     integration_key: str = ""
     secret_key: str = ""
     push_timeout: int = 60
+    # Send the push concurrently with the AD password check. Lower latency,
+    # but a wrong password can still trigger a push to the user's device
+    push_during_primary: bool = False
 
 
 @dataclass
@@ -39,6 +42,7 @@ class ADClientConfig:
     bind_password: str = ""
     search_filter: str = "(sAMAccountName={username})"
     search_attribute: str = "sAMAccountName"
+    dn_cache_ttl: int = 300  # Seconds to cache user DN lookups (0 disables)
 
 
 @dataclass
@@ -57,6 +61,7 @@ class RADIUSServerConfig:
     mode: str = "auto"  # auto, concat, challenge
     clients: List[RADIUSClient] = field(default_factory=list)
     fail_open: bool = False
+    max_concurrent: int = 512  # Requests processed at once; extra packets are dropped
 
 
 @dataclass
@@ -72,6 +77,11 @@ class LDAPServerConfig:
     # Service account exemption settings (like Duo)
     exempt_primary_bind: bool = True  # Skip 2FA for first bind in connection
     exempt_ous: List[str] = field(default_factory=list)  # DNs to exempt from 2FA
+    search_cache_ttl: int = 30  # Seconds to cache proxied search results (0 disables)
+    # Attributes fetched from AD when a client asks for all attributes
+    default_search_attributes: List[str] = field(default_factory=lambda: ["*", "+"])
+    # RootDSE namingContexts answered locally (empty = forward RootDSE to AD)
+    naming_contexts: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -149,6 +159,7 @@ class ConfigParser:
         self.config.api.integration_key = options.get("integration_key", "")
         self.config.api.secret_key = options.get("secret_key", "")
         self.config.api.push_timeout = int(options.get("push_timeout", "60"))
+        self.config.api.push_during_primary = options.get("push_during_primary", "false").lower() == "true"
 
     def _parse_ad_client(self, section: str, options: Dict[str, str]):
         """Parse [ad_client] section"""
@@ -162,6 +173,7 @@ class ConfigParser:
         client.bind_password = options.get("bind_password", "")
         client.search_filter = options.get("search_filter", "(sAMAccountName={username})")
         client.search_attribute = options.get("search_attribute", "sAMAccountName")
+        client.dn_cache_ttl = int(options.get("dn_cache_ttl", "300"))
 
         self.config.ad_clients[section] = client
 
@@ -172,6 +184,7 @@ class ConfigParser:
         server.port = int(options.get("port", "1812"))
         server.client_name = options.get("client", "")
         server.fail_open = options.get("fail_open", "false").lower() == "true"
+        server.max_concurrent = int(options.get("max_concurrent", "512"))
 
         # Determine mode from section name
         if "_auto" in section:
@@ -214,6 +227,21 @@ class ConfigParser:
             ou_index += 1
         server.exempt_ous = exempt_ous
 
+        server.search_cache_ttl = int(options.get("search_cache_ttl", "30"))
+        server.default_search_attributes = [
+            attr.strip()
+            for attr in options.get("default_search_attributes", "*, +").split(",")
+            if attr.strip()
+        ]
+
+        # Parse naming_context_1, naming_context_2, etc.
+        naming_contexts = []
+        nc_index = 1
+        while f"naming_context_{nc_index}" in options:
+            naming_contexts.append(options[f"naming_context_{nc_index}"])
+            nc_index += 1
+        server.naming_contexts = naming_contexts
+
         self.config.ldap_servers[section] = server
 
     def _validate_config(self):
@@ -232,6 +260,8 @@ class ConfigParser:
                 errors.append(f"{name}.client '{server.client_name}' not found")
             if not server.clients:
                 errors.append(f"{name} has no RADIUS clients configured")
+            if server.max_concurrent < 1:
+                errors.append(f"{name}.max_concurrent must be at least 1")
 
         for name, server in self.config.ldap_servers.items():
             if server.client_name and server.client_name not in self.config.ad_clients:
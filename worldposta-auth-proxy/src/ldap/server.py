@@ -3,12 +3,15 @@ WorldPosta Authentication Proxy - LDAP Server
 Handles LDAP authentication requests from vCenter and other applications
 """
 
+import time
+import queue
 import logging
 import asyncio
-from typing import Optional, Dict, Tuple
+import threading
+from typing import Any, Callable, Optional, Dict, List, Tuple
 from functools import partial
 
-from twisted.internet import reactor, protocol
+from twisted.internet import reactor, protocol, defer, threads
 from twisted.internet.endpoints import TCP4ServerEndpoint
 from ldaptor.protocols.ldap import ldapclient, ldapserver, ldapsyntax
 from ldaptor.protocols.ldap.ldaperrors import (
@@ -17,6 +20,8 @@ from ldaptor.protocols.ldap.ldaperrors import (
     LDAPOperationsError
 )
 from ldaptor.protocols import pureldap
+from ldap3 import Server, Connection, NONE, BASE, LEVEL, SUBTREE
+from ldap3.core.exceptions import LDAPBindError, LDAPCommunicationError
 
 from ..config import LDAPServerConfig, ADClientConfig
 from ..auth.engine import AuthEngine, AuthResult
@@ -24,6 +29,264 @@ from ..api import WorldPostaClient
 
 logger = logging.getLogger(__name__)
 
+# Match-everything filter, used as the default and fallback search filter
+ANY_OBJECT_FILTER = "(objectClass=*)"
+
+# Extended operation OIDs, compared as the raw bytes ldaptor decodes
+OID_WHOAMI = b"1.3.6.1.4.1.4203.1.11.3"
+OID_STARTTLS = b"1.3.6.1.4.1.1466.20037"
+
+# Error messages for operations the proxy refuses
+ERR_STARTTLS = b"StartTLS not supported"
+ERR_MODIFY = b"Modify operations not supported by proxy"
+ERR_ADD = b"Add operations not supported by proxy"
+ERR_DELETE = b"Delete operations not supported by proxy"
+ERR_MODIFY_DN = b"Modify DN operations not supported by proxy"
+
+# RootDSE attributes that do not depend on configuration
+ROOT_DSE_STATIC_ATTRIBUTES = (
+    (b"supportedLDAPVersion", [b"3"]),
+)
+
+# LDAP search scope from the request (0=base, 1=onelevel, 2=subtree) to ldap3
+SCOPE_MAP = {0: BASE, 1: LEVEL, 2: SUBTREE}
+
+# Entries requested per page when proxying searches to AD (AD's default
+# MaxPageSize is 1000)
+SEARCH_PAGE_SIZE = 500
+
+# Search result cache bounds: number of cached queries, and the largest
+# result set that is cached at all
+SEARCH_CACHE_MAX_ENTRIES = 256
+SEARCH_CACHE_MAX_RESULTS = 1000
+
+# Errors from a pooled AD connection that the server has dropped (idle
+# timeout, DC restart). rebind() reports a dropped socket as LDAPBindError.
+STALE_CONN_ERRORS = (LDAPCommunicationError, LDAPBindError)
+
+# Known binary attributes that must be passed as raw bytes (lowercase)
+BINARY_ATTRIBUTES = frozenset({
+    'objectsid', 'objectguid', 'msexchmailboxguid', 'msexchmailboxsecuritydescriptor',
+    'securityidentifier', 'sid', 'sidhistory', 'usercertificate', 'cacertificate',
+    'logonhours', 'jpegphoto', 'thumbnailphoto', 'usersmimecertificate',
+    'msds-generationid', 'msds-cloudextensionattribute1'
+})
+
+# Windows FILETIME attributes that must be returned as raw integer strings (lowercase)
+# These are 64-bit integers representing 100-nanosecond intervals since 1601-01-01
+FILETIME_ATTRIBUTES = frozenset({
+    'accountexpires', 'pwdlastset', 'lastlogon', 'lastlogontimestamp',
+    'badpasswordtime', 'lockouttime', 'lastlogoff', 'creationtime',
+    'msds-lastsuccessfulinteractivelogontime', 'msds-lastfailedinteractivelogontime'
+})
+
+
+class _SearchInterrupted(Exception):
+    """AD connection failed after entries were already relayed; not retried"""
+
+
+def _deferred_from_future(future) -> defer.Deferred:
+    """
+    Wrap a concurrent.futures.Future in a Deferred
+
+    The Deferred fires on the reactor thread; cancelling it cancels the
+    future (and the coroutine behind it).
+    """
+    d = defer.Deferred(lambda _: future.cancel())
+
+    def _fire(f):
+        if d.called:
+            return
+        if f.cancelled():
+            d.cancel()
+            return
+        exc = f.exception()
+        if exc is not None:
+            d.errback(exc)
+        else:
+            d.callback(f.result())
+
+    future.add_done_callback(lambda f: reactor.callFromThread(_fire, f))
+    return d
+
+
+# Filter handlers for WorldPostaLDAPServer._convert_filter_into, keyed by
+# ldaptor filter class. Each appends its pieces to a shared output list that
+# is joined once at the top. Children of AND/OR are read from .data, the plain
+# list behind ldaptor's UserList; len()/iteration on the wrapper is much slower.
+
+def _equality_filter(server, filt, out: list):
+    """Equality match: (attr=value)"""
+    out.append(f"({server._get_bytes_value(filt.attributeDesc)}="
+               f"{server._get_bytes_value(filt.assertionValue)})")
+
+
+def _and_filter(server, filt, out: list):
+    """AND filter: (&(filter1)(filter2)...)"""
+    out.append("(&")
+    for child in filt.data:
+        server._convert_filter_into(child, out)
+    out.append(")")
+
+
+def _or_filter(server, filt, out: list):
+    """OR filter: (|(filter1)(filter2)...)"""
+    out.append("(|")
+    for child in filt.data:
+        server._convert_filter_into(child, out)
+    out.append(")")
+
+
+def _not_filter(server, filt, out: list):
+    """NOT filter: (!(filter))"""
+    out.append("(!")
+    server._convert_filter_into(filt.value, out)
+    out.append(")")
+
+
+def _present_filter(server, filt, out: list):
+    """Present filter: (attr=*)"""
+    if filt.value == b"objectClass":
+        out.append(ANY_OBJECT_FILTER)
+    else:
+        out.append(f"({server._get_bytes_value(filt)}=*)")
+
+
+_SUBSTRING_FORMATS = {
+    pureldap.LDAPFilter_substrings_initial: "{}*",
+    pureldap.LDAPFilter_substrings_any: "*{}*",
+    pureldap.LDAPFilter_substrings_final: "*{}",
+}
+
+
+def _substrings_filter(server, filt, out: list):
+    """Substring filter: (attr=*val*)"""
+    attr = server._get_bytes_value(filt.type)
+    parts = []
+    if filt.substrings:
+        for sub in filt.substrings:
+            fmt = _SUBSTRING_FORMATS.get(type(sub))
+            if fmt is not None:
+                parts.append(fmt.format(server._get_bytes_value(sub)))
+    if parts:
+        out.append(f"({attr}={''.join(parts)})")
+    else:
+        out.append(f"({attr}=*)")
+
+
+def _comparison_filter(op: str):
+    """Build a handler for (attr<op>value) filters"""
+    def handler(server, filt, out: list):
+        out.append(f"({server._get_bytes_value(filt.attributeDesc)}{op}"
+                   f"{server._get_bytes_value(filt.assertionValue)})")
+    return handler
+
+
+_FILTER_HANDLERS = {
+    pureldap.LDAPFilter_and: _and_filter,
+    pureldap.LDAPFilter_or: _or_filter,
+    pureldap.LDAPFilter_not: _not_filter,
+    pureldap.LDAPFilter_present: _present_filter,
+    pureldap.LDAPFilter_equalityMatch: _equality_filter,
+    pureldap.LDAPFilter_substrings: _substrings_filter,
+    pureldap.LDAPFilter_greaterOrEqual: _comparison_filter(">="),
+    pureldap.LDAPFilter_lessOrEqual: _comparison_filter("<="),
+    pureldap.LDAPFilter_approxMatch: _comparison_filter("~="),
+}
+
+
+def _encode_text(v) -> bytes:
+    """Encode a decoded attribute value as UTF-8 bytes"""
+    if isinstance(v, str):
+        return v.encode('utf-8')
+    if isinstance(v, bytes):
+        return v
+    return str(v).encode('utf-8')
+
+
+def _encode_raw_binary(raw_v) -> bytes:
+    """Binary attribute raw value - pass through as bytes"""
+    if isinstance(raw_v, bytes):
+        return raw_v
+    return bytes(raw_v) if raw_v else b''
+
+
+def _encode_binary(v) -> bytes:
+    """Binary attribute with no raw value - try to preserve the value"""
+    if isinstance(v, bytes):
+        return v
+    logger.debug("Binary attribute has non-bytes value type: %s", type(v))
+    if hasattr(v, '__bytes__'):
+        return bytes(v)
+    return str(v).encode('utf-8')
+
+
+def _encode_raw_text(raw_v) -> bytes:
+    """FILETIME raw value (should be integer bytes) - pass through"""
+    if isinstance(raw_v, bytes):
+        return raw_v
+    return str(raw_v).encode('utf-8')
+
+
+def _encode_filetime(v) -> bytes:
+    """
+    FILETIME attribute with no raw value - vCenter expects raw integer strings
+
+    ldap3 may convert these to datetime objects, so convert back.
+    """
+    if isinstance(v, int):
+        # Already an integer
+        return str(v).encode('utf-8')
+    if hasattr(v, 'timestamp'):
+        # datetime object - convert back to FILETIME
+        # FILETIME = (unix_timestamp + 11644473600) * 10000000
+        try:
+            filetime = int((v.timestamp() + 11644473600) * 10000000)
+            logger.debug("Converted datetime %s to FILETIME %d", v, filetime)
+            return str(filetime).encode('utf-8')
+        except Exception as dt_err:
+            logger.debug("Error converting datetime to FILETIME: %s", dt_err)
+            # Fallback to 0 (never expires / not set)
+            return b'0'
+    # String or other - pass through
+    return str(v).encode('utf-8')
+
+
+def _encode_values(attr_name: str, values, raw_values) -> List[bytes]:
+    """
+    Encode one attribute's values from an ldap3 search response
+
+    Args:
+        attr_name: Attribute name as returned by AD
+        values: Decoded value list (single values may come back unwrapped)
+        raw_values: Raw bytes values from AD, if any
+
+    Returns:
+        List of bytes values for the LDAP result entry
+    """
+    # Single-valued attributes may come back unwrapped
+    if not isinstance(values, list):
+        values = [values]
+
+    # Pick the encoder once per attribute rather than per value
+    attr_lower = attr_name.lower()
+    if attr_lower in BINARY_ATTRIBUTES:
+        encode_raw, encode_value = _encode_raw_binary, _encode_binary
+    elif attr_lower in FILETIME_ATTRIBUTES:
+        encode_raw, encode_value = _encode_raw_text, _encode_filetime
+    else:
+        # Non-binary, non-filetime attributes
+        return [_encode_text(v) for v in values]
+
+    # Raw values from AD are preferred when available
+    if raw_values and len(raw_values) >= len(values):
+        return [encode_raw(rv) for rv in raw_values[:len(values)]]
+    n_raw = len(raw_values) if raw_values else 0
+    return [
+        encode_raw(raw_values[i]) if i < n_raw else encode_value(v)
+        for i, v in enumerate(values)
+    ]
+
 
 class WorldPostaLDAPServer(ldapserver.LDAPServer):
     """
@@ -38,65 +301,72 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
     """
 
     def __init__(self, config: LDAPServerConfig, ad_config: ADClientConfig,
-                 api_config, service_name: str = "LDAP Authentication"):
+                 api_config, service_name: str = "LDAP Authentication",
+                 auth_engine: Optional[AuthEngine] = None):
         ldapserver.LDAPServer.__init__(self)
         self.config = config
         self.ad_config = ad_config
         self.api_config = api_config
         self.service_name = service_name
-        self._auth_engine: Optional[AuthEngine] = None
+        # Shared by all connections; owned and closed by the factory
+        self.auth_engine = auth_engine
         self._first_bind_done = False  # Track first bind for exempt_primary_bind
 
-    def _get_auth_engine(self) -> AuthEngine:
-        """Get or create auth engine"""
-        if self._auth_engine is None:
-            self._auth_engine = AuthEngine(
-                ad_config=self.ad_config,
-                api_config=self.api_config,
-                service_name=self.service_name
-            )
-        return self._auth_engine
-
-    def _is_exempt_from_2fa(self, dn: str) -> Tuple[bool, str]:
+    def _is_exempt_from_2fa(self, dn: str, dn_lower: str) -> Tuple[bool, str]:
         """
         Check if DN is exempt from 2FA
 
+        Args:
+            dn: Bind DN as sent by the client
+            dn_lower: dn.lower(), computed once by the bind handler
+
         Returns:
             Tuple of (is_exempt, reason)
         """
-        dn_lower = dn.lower()
-
         # Check exempt_primary_bind - skip 2FA for first bind in connection
         if self.config.exempt_primary_bind and not self._first_bind_done:
             return True, "exempt_primary_bind (first bind in connection)"
 
+        factory = self.factory
+        at = dn_lower.find("@")
+        upn_user = dn_lower[:at] if at != -1 else None
+
         # Check if DN matches the AD service account (auto-exempt)
-        if self.ad_config and self.ad_config.bind_dn:
-            service_dn = self.ad_config.bind_dn.lower()
-            # Match various formats: DN, UPN (user@domain), DOMAIN\user
-            if dn_lower == service_dn:
+        # Match various formats: DN, UPN (user@domain), DOMAIN\user
+        if factory.service_dn:
+            if dn_lower == factory.service_dn:
                 return True, f"service account (ad_client bind_dn)"
             # Also check username part for UPN format
-            if "@" in dn_lower and "@" in service_dn:
-                if dn_lower.split("@")[0] == service_dn.split("@")[0]:
-                    return True, f"service account (matching username)"
+            if upn_user is not None and upn_user == factory.service_upn_user:
+                return True, f"service account (matching username)"
 
         # Check explicit exempt_ou list
-        for exempt_dn in self.config.exempt_ous:
-            exempt_lower = exempt_dn.lower()
-            # Exact match
-            if dn_lower == exempt_lower:
-                return True, f"exempt_ou match: {exempt_dn}"
-            # UPN/username match
-            if "@" in dn_lower and "@" in exempt_lower:
-                if dn_lower.split("@")[0] == exempt_lower.split("@")[0]:
-                    return True, f"exempt_ou match (username): {exempt_dn}"
-            # Check if DN ends with exempt OU (user is in that OU)
-            if dn_lower.endswith("," + exempt_lower):
-                return True, f"exempt_ou contains: {exempt_dn}"
+        exempt_dn = factory.exempt_exact.get(dn_lower)
+        if exempt_dn is not None:
+            return True, f"exempt_ou match: {exempt_dn}"
+        if upn_user is not None:
+            exempt_dn = factory.exempt_upn_users.get(upn_user)
+            if exempt_dn is not None:
+                return True, f"exempt_ou match (username): {exempt_dn}"
+        # Check if DN ends with exempt OU (user is in that OU)
+        if factory.exempt_suffixes and dn_lower.endswith(factory.exempt_suffixes):
+            exempt_dn = next(
+                orig for suffix, orig in zip(factory.exempt_suffixes, self.config.exempt_ous)
+                if dn_lower.endswith(suffix)
+            )
+            return True, f"exempt_ou contains: {exempt_dn}"
 
         return False, ""
 
+    @staticmethod
+    def _to_text(value) -> str:
+        """Decode a bytes request field as UTF-8; str passes through as-is"""
+        if type(value) is bytes:
+            return value.decode('utf-8')
+        if type(value) is str:
+            return value
+        return str(value)
+
     def _get_bytes_value(self, obj) -> str:
         """Extract string value from ldaptor object or bytes"""
         if isinstance(obj, bytes):
@@ -110,82 +380,28 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
 
     def _convert_filter(self, filt) -> str:
         """
-        Recursively convert ldaptor filter object to LDAP filter string
+        Convert ldaptor filter object to LDAP filter string
 
         Handles: AND, OR, NOT, present, equalityMatch, substrings, etc.
         """
-        from ldaptor.protocols import pureldap
-
-        filt_class = filt.__class__.__name__
-
-        # AND filter: (&(filter1)(filter2)...)
-        if filt_class == 'LDAPFilter_and':
-            parts = [self._convert_filter(f) for f in filt]
-            return "(&" + "".join(parts) + ")"
-
-        # OR filter: (|(filter1)(filter2)...)
-        elif filt_class == 'LDAPFilter_or':
-            parts = [self._convert_filter(f) for f in filt]
-            return "(|" + "".join(parts) + ")"
-
-        # NOT filter: (!(filter))
-        elif filt_class == 'LDAPFilter_not':
-            inner = self._convert_filter(filt.value)
-            return "(!" + inner + ")"
-
-        # Present filter: (attr=*)
-        elif filt_class == 'LDAPFilter_present':
-            attr = self._get_bytes_value(filt)
-            return f"({attr}=*)"
-
-        # Equality match: (attr=value)
-        elif filt_class == 'LDAPFilter_equalityMatch':
-            attr = self._get_bytes_value(filt.attributeDesc)
-            val = self._get_bytes_value(filt.assertionValue)
-            return f"({attr}={val})"
-
-        # Substring filter: (attr=*val*)
-        elif filt_class == 'LDAPFilter_substrings':
-            attr = self._get_bytes_value(filt.type)
-            parts = []
-            if filt.substrings:
-                for sub in filt.substrings:
-                    sub_class = sub.__class__.__name__
-                    sub_val = self._get_bytes_value(sub)
-                    if sub_class == 'LDAPFilter_substrings_initial':
-                        parts.append(f"{sub_val}*")
-                    elif sub_class == 'LDAPFilter_substrings_any':
-                        parts.append(f"*{sub_val}*")
-                    elif sub_class == 'LDAPFilter_substrings_final':
-                        parts.append(f"*{sub_val}")
-            if parts:
-                return f"({attr}={''.join(parts)})"
-            return f"({attr}=*)"
-
-        # Greater or equal: (attr>=value)
-        elif filt_class == 'LDAPFilter_greaterOrEqual':
-            attr = self._get_bytes_value(filt.attributeDesc)
-            val = self._get_bytes_value(filt.assertionValue)
-            return f"({attr}>={val})"
-
-        # Less or equal: (attr<=value)
-        elif filt_class == 'LDAPFilter_lessOrEqual':
-            attr = self._get_bytes_value(filt.attributeDesc)
-            val = self._get_bytes_value(filt.assertionValue)
-            return f"({attr}<={val})"
-
-        # Approx match: (attr~=value)
-        elif filt_class == 'LDAPFilter_approxMatch':
-            attr = self._get_bytes_value(filt.attributeDesc)
-            val = self._get_bytes_value(filt.assertionValue)
-            return f"({attr}~={val})"
-
-        # Fallback - try to get string representation
-        else:
-            logger.debug(f"Unknown filter type: {filt_class}")
-            return "(objectClass=*)"
+        # Top-level filters that are a single (objectClass=*) skip the builder
+        if type(filt) is pureldap.LDAPFilter_present and filt.value == b"objectClass":
+            return ANY_OBJECT_FILTER
+        out = []
+        self._convert_filter_into(filt, out)
+        return "".join(out)
+
+    def _convert_filter_into(self, filt, out: list):
+        """Recursively append the string form of filt to out"""
+        handler = _FILTER_HANDLERS.get(type(filt))
+        if handler is None:
+            # Fallback - match everything
+            logger.debug(f"Unknown filter type: {type(filt).__name__}")
+            out.append(ANY_OBJECT_FILTER)
+            return
+        handler(self, filt, out)
 
-    def _extract_username(self, dn: str) -> str:
+    def _extract_username(self, dn: str, dn_lower: str) -> str:
         """
         Extract username from DN
 
@@ -195,25 +411,26 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         - username@company.com
         - DOMAIN\\username
         """
-        dn_lower = dn.lower()
-
-        # Try CN=
+        # Try CN= / uid= - value runs up to the first comma
         if dn_lower.startswith("cn="):
-            parts = dn.split(",")
-            return parts[0][3:]  # Remove "CN="
-
-        # Try uid=
-        if dn_lower.startswith("uid="):
-            parts = dn.split(",")
-            return parts[0][4:]  # Remove "uid="
+            start = 3
+        elif dn_lower.startswith("uid="):
+            start = 4
+        else:
+            start = 0
+        if start:
+            comma = dn.find(",", start)
+            return dn[start:comma] if comma != -1 else dn[start:]
 
         # Try email format
-        if "@" in dn and "=" not in dn:
-            return dn.split("@")[0]
+        at = dn.find("@")
+        if at != -1 and "=" not in dn:
+            return dn[:at]
 
         # Try DOMAIN\username
-        if "\\" in dn:
-            return dn.split("\\")[-1]
+        backslash = dn.rfind("\\")
+        if backslash != -1:
+            return dn[backslash + 1:]
 
         # Return as-is
         return dn
@@ -222,7 +439,7 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         """
         Handle LDAP bind request with 2FA
         """
-        dn = request.dn.decode() if isinstance(request.dn, bytes) else request.dn
+        dn = self._to_text(request.dn)
 
         # Handle anonymous bind
         if not dn or request.auth == b'':
@@ -230,8 +447,9 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
             reply(pureldap.LDAPBindResponse(resultCode=0))
             return
 
-        password = request.auth.decode() if isinstance(request.auth, bytes) else request.auth
-        username = self._extract_username(dn)
+        password = self._to_text(request.auth)
+        dn_lower = dn.lower()
+        username = self._extract_username(dn, dn_lower)
 
         logger.info(f"LDAP bind request: dn={dn}, username={username}")
 
@@ -242,65 +460,77 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
             client_ip = "unknown"
 
         # Check if this DN is exempt from 2FA (service account)
-        is_exempt, exempt_reason = self._is_exempt_from_2fa(dn)
+        is_exempt, exempt_reason = self._is_exempt_from_2fa(dn, dn_lower)
 
         if is_exempt:
             logger.info(f"2FA EXEMPT for {username}: {exempt_reason}")
-            # Only verify AD password, skip 2FA
-            try:
-                from ldap3 import Server, Connection, ALL
-                server = Server(self.ad_config.host, port=self.ad_config.port, get_info=ALL)
-                conn = Connection(server, user=dn, password=password)
-                if conn.bind():
-                    logger.info(f"LDAP bind successful (exempt) for: {username}")
-                    conn.unbind()
-                    self._first_bind_done = True
-                    reply(pureldap.LDAPBindResponse(resultCode=0))
-                else:
-                    logger.warning(f"LDAP bind failed (exempt) for {username}: invalid credentials")
-                    self._first_bind_done = True
-                    reply(pureldap.LDAPBindResponse(resultCode=49, errorMessage=b"Invalid credentials"))
-            except Exception as e:
-                logger.error(f"Error during exempt LDAP bind for {username}: {e}")
-                reply(pureldap.LDAPBindResponse(resultCode=1, errorMessage=str(e).encode()))
-            return
-
-        # Not exempt - require 2FA
-        try:
-            # Run authentication in thread pool (to not block Twisted reactor)
-            auth_engine = self._get_auth_engine()
+            bind = self._bind_exempt(dn, username, password, reply)
+        else:
+            bind = self._bind_2fa(username, password, client_ip, reply)
 
-            # Use asyncio from thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result, message = loop.run_until_complete(
-                    auth_engine.authenticate(
-                        username=username,
-                        password=password,
-                        device_info=f"LDAP client",
-                        ip_address=client_ip,
-                        mode="auto"
-                    )
-                )
-                # Close the API client session to avoid "Unclosed client session" error
-                if hasattr(auth_engine, 'api_client') and auth_engine.api_client:
-                    loop.run_until_complete(auth_engine.api_client.close())
-            finally:
-                loop.close()
+        # Returning the Deferred lets the reactor serve other connections
+        # while the AD check and push wait are in flight
+        d = defer.ensureDeferred(bind)
+        d.addErrback(self._bind_connection_lost, username)
+        return d
 
-            self._first_bind_done = True
+    async def _bind_exempt(self, dn: str, username: str, password: str, reply):
+        """Verify AD password only, skip 2FA"""
+        try:
+            valid = await threads.deferToThread(self.factory.verify_ad_bind, dn, password)
+        except Exception as e:
+            logger.error(f"Error during exempt LDAP bind for {username}: {e}")
+            reply(pureldap.LDAPBindResponse(resultCode=1, errorMessage=str(e).encode()))
+            return
 
-            if result == AuthResult.SUCCESS:
-                logger.info(f"LDAP bind successful for: {username}")
-                reply(pureldap.LDAPBindResponse(resultCode=0))
-            else:
-                logger.warning(f"LDAP bind failed for {username}: {message}")
-                reply(pureldap.LDAPBindResponse(resultCode=49, errorMessage=message.encode() if isinstance(message, str) else message))
+        self._first_bind_done = True
+        if valid:
+            logger.info(f"LDAP bind successful (exempt) for: {username}")
+            reply(pureldap.LDAPBindResponse(resultCode=0))
+        else:
+            logger.warning(f"LDAP bind failed (exempt) for {username}: invalid credentials")
+            reply(pureldap.LDAPBindResponse(resultCode=49, errorMessage=b"Invalid credentials"))
 
+    async def _bind_2fa(self, username: str, password: str, client_ip: str, reply):
+        """Run primary auth + 2FA on the factory's event loop"""
+        try:
+            # Run on the factory's persistent event loop so the API client
+            # keeps its connections between binds
+            future = asyncio.run_coroutine_threadsafe(
+                self.auth_engine.authenticate(
+                    username=username,
+                    password=password,
+                    device_info=f"LDAP client",
+                    ip_address=client_ip,
+                    mode="auto"
+                ),
+                self.factory.loop
+            )
+            d = _deferred_from_future(future)
+            d.addTimeout(self.factory.auth_timeout, reactor)
+            result, message = await d
+        except defer.TimeoutError:
+            logger.error(f"LDAP bind timed out for {username}")
+            reply(pureldap.LDAPBindResponse(resultCode=1, errorMessage=b"Authentication timed out"))
+            return
         except Exception as e:
             logger.error(f"Error during LDAP bind for {username}: {e}")
             reply(pureldap.LDAPBindResponse(resultCode=1, errorMessage=str(e).encode()))
+            return
+
+        self._first_bind_done = True
+
+        if result == AuthResult.SUCCESS:
+            logger.info(f"LDAP bind successful for: {username}")
+            reply(pureldap.LDAPBindResponse(resultCode=0))
+        else:
+            logger.warning(f"LDAP bind failed for {username}: {message}")
+            reply(pureldap.LDAPBindResponse(resultCode=49, errorMessage=message.encode() if isinstance(message, str) else message))
+
+    def _bind_connection_lost(self, failure, username: str):
+        """Swallow the reply error when the client disconnected mid-bind"""
+        failure.trap(ldapserver.LDAPServerConnectionLostException)
+        logger.debug(f"LDAP client disconnected before bind result for {username}")
 
     def handle_LDAPSearchRequest(self, request, controls, reply):
         """
@@ -310,172 +540,189 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         Only bind requests trigger 2FA.
         """
         try:
-            base_object = request.baseObject.decode('utf-8') if isinstance(request.baseObject, bytes) else str(request.baseObject)
-        except:
-            base_object = "unknown"
+            base_object = self._to_text(request.baseObject)
+        except UnicodeDecodeError:
+            logger.error("LDAP search request with a base DN that is not valid UTF-8")
+            reply(pureldap.LDAPSearchResultDone(resultCode=0))
+            return
 
-        logger.debug(f"LDAP search request: base={base_object}")
+        # Checked once so per-search and per-entry debug strings are only
+        # built when DEBUG is actually enabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"LDAP search request: base={base_object}")
 
         # Proxy search to real AD
         if self.ad_config:
             try:
-                from ldap3 import Server, Connection, ALL, SUBTREE
-
-                server = Server(self.ad_config.host, port=self.ad_config.port, get_info=ALL)
-                conn = Connection(
-                    server,
-                    user=self.ad_config.bind_dn,
-                    password=self.ad_config.bind_password,
-                    auto_bind=True
-                )
-
                 # Get search parameters
-                search_base = request.baseObject.decode('utf-8') if isinstance(request.baseObject, bytes) else str(request.baseObject)
+                search_base = base_object
 
                 # Get search scope from request (0=base, 1=onelevel, 2=subtree)
-                from ldap3 import BASE, LEVEL, SUBTREE
-                scope_map = {0: BASE, 1: LEVEL, 2: SUBTREE}
-                search_scope = scope_map.get(request.scope, SUBTREE)
-                logger.debug(f"Search scope: {request.scope} -> {search_scope}")
+                search_scope = SCOPE_MAP.get(request.scope, SUBTREE)
+                if debug:
+                    logger.debug(f"Search scope: {request.scope} -> {search_scope}")
 
                 # Convert filter to string properly
-                search_filter = "(objectClass=*)"  # default
+                search_filter = ANY_OBJECT_FILTER  # default
                 if request.filter is not None:
                     try:
                         search_filter = self._convert_filter(request.filter)
-                        logger.debug(f"Converted filter: {search_filter}")
+                        if debug:
+                            logger.debug(f"Converted filter: {search_filter}")
                     except Exception as filter_err:
                         logger.debug(f"Could not parse filter, using default: {filter_err}")
-                        search_filter = "(objectClass=*)"
-
-                logger.debug(f"Proxying search to AD: base={search_base}, filter={search_filter}, scope={search_scope}")
-
-                # Perform search with correct scope
-                # Request all user attrs (*) plus operational attrs (+) which includes objectSid, objectGUID
-                conn.search(
-                    search_base=search_base,
-                    search_filter=search_filter,
-                    search_scope=search_scope,
-                    attributes=['*', '+']
-                )
-
-                logger.debug(f"AD returned {len(conn.entries)} entries")
-
-                # Known binary attributes that must be passed as raw bytes
-                binary_attributes = {
-                    'objectsid', 'objectguid', 'msexchmailboxguid', 'msexchmailboxsecuritydescriptor',
-                    'securityidentifier', 'sid', 'sidhistory', 'usercertificate', 'cacertificate',
-                    'logonhours', 'jpegphoto', 'thumbnailphoto', 'usersmimecertificate',
-                    'msds-generationid', 'msds-cloudextensionattribute1'
-                }
-
-                # Windows FILETIME attributes that must be returned as raw integer strings
-                # These are 64-bit integers representing 100-nanosecond intervals since 1601-01-01
-                filetime_attributes = {
-                    'accountexpires', 'pwdlastset', 'lastlogon', 'lastlogontimestamp',
-                    'badpasswordtime', 'lockouttime', 'lastlogoff', 'creationtime',
-                    'msds-lastsuccessfulinteractivelogontime', 'msds-lastfailedinteractivelogontime'
-                }
-
-                # Send results back
-                for entry in conn.entries:
-                    try:
-                        # Debug: log if objectSid is present and its type
-                        if 'objectSid' in entry.entry_attributes:
-                            sid_val = entry['objectSid'].value
-                            sid_raw = entry['objectSid'].raw_values[0] if entry['objectSid'].raw_values else None
-                            logger.debug(f"objectSid for {entry.entry_dn}: value type={type(sid_val)}, raw type={type(sid_raw) if sid_raw else 'None'}, raw len={len(sid_raw) if sid_raw else 0}")
-
-                        # Build attributes list
-                        attrs = []
-                        for attr_name in entry.entry_attributes:
-                            values = entry[attr_name].values
-                            raw_values = entry[attr_name].raw_values if hasattr(entry[attr_name], 'raw_values') else None
-
-                            if values:
-                                attr_vals = []
-                                is_binary = attr_name.lower() in binary_attributes
-
-                                is_filetime = attr_name.lower() in filetime_attributes
-
-                                for i, v in enumerate(values):
-                                    if is_binary:
-                                        # For binary attributes, use raw_values if available
-                                        if raw_values and i < len(raw_values):
-                                            raw_v = raw_values[i]
-                                            if isinstance(raw_v, bytes):
-                                                attr_vals.append(raw_v)
-                                            else:
-                                                attr_vals.append(bytes(raw_v) if raw_v else b'')
-                                        elif isinstance(v, bytes):
-                                            attr_vals.append(v)
-                                        else:
-                                            # Last resort - try to preserve the value
-                                            logger.debug(f"Binary attribute {attr_name} has non-bytes value type: {type(v)}")
-                                            if hasattr(v, '__bytes__'):
-                                                attr_vals.append(bytes(v))
-                                            else:
-                                                attr_vals.append(str(v).encode('utf-8'))
-                                    elif is_filetime:
-                                        # FILETIME attributes - vCenter expects raw integer strings
-                                        # ldap3 may convert these to datetime objects, we need to convert back
-                                        if raw_values and i < len(raw_values):
-                                            # Use raw value if available (should be integer bytes)
-                                            raw_v = raw_values[i]
-                                            if isinstance(raw_v, bytes):
-                                                attr_vals.append(raw_v)
-                                            else:
-                                                attr_vals.append(str(raw_v).encode('utf-8'))
-                                        elif isinstance(v, int):
-                                            # Already an integer
-                                            attr_vals.append(str(v).encode('utf-8'))
-                                        elif hasattr(v, 'timestamp'):
-                                            # datetime object - convert back to FILETIME
-                                            # FILETIME = (unix_timestamp + 11644473600) * 10000000
-                                            try:
-                                                import datetime
-                                                unix_ts = v.timestamp()
-                                                filetime = int((unix_ts + 11644473600) * 10000000)
-                                                attr_vals.append(str(filetime).encode('utf-8'))
-                                                logger.debug(f"Converted {attr_name} datetime {v} to FILETIME {filetime}")
-                                            except Exception as dt_err:
-                                                logger.debug(f"Error converting {attr_name} datetime: {dt_err}")
-                                                # Fallback to 0 (never expires / not set)
-                                                attr_vals.append(b'0')
-                                        else:
-                                            # String or other - pass through
-                                            attr_vals.append(str(v).encode('utf-8'))
-                                    else:
-                                        # Non-binary, non-filetime attributes
-                                        if isinstance(v, str):
-                                            attr_vals.append(v.encode('utf-8'))
-                                        elif isinstance(v, bytes):
-                                            attr_vals.append(v)
-                                        else:
-                                            attr_vals.append(str(v).encode('utf-8'))
-
-                                attrs.append((attr_name.encode('utf-8'), attr_vals))
-
-                        result_entry = pureldap.LDAPSearchResultEntry(
-                            objectName=entry.entry_dn.encode('utf-8'),
-                            attributes=attrs
-                        )
+                        search_filter = ANY_OBJECT_FILTER
+
+                # Pass explicit attribute lists through; "all attributes" (empty
+                # list or just "*") gets the configured default set
+                search_attributes = [self._get_bytes_value(a) for a in request.attributes]
+                if not search_attributes or search_attributes == ["*"]:
+                    search_attributes = self.config.default_search_attributes
+
+                # RootDSE probes are answered locally when naming contexts
+                # are configured, skipping the AD round trip
+                root_dse = self.factory.root_dse
+                if (root_dse is not None and not search_base and request.scope == 0
+                        and search_filter.lower() == "(objectclass=*)"):
+                    if debug:
+                        logger.debug("Answering RootDSE search locally")
+                    reply(root_dse)
+                    reply(pureldap.LDAPSearchResultDone(resultCode=0))
+                    return
+
+                # Repeated queries (vCenter polls the same lookups) are served
+                # from the factory's short-lived result cache
+                cache_key = (search_base.lower(), search_filter, request.scope, tuple(search_attributes))
+                cached = self.factory.get_cached_search(cache_key)
+                if cached is not None:
+                    if debug:
+                        logger.debug(f"Search cache hit: base={search_base}, filter={search_filter}, {len(cached)} entries")
+                    for result_entry in cached:
                         reply(result_entry)
-                    except Exception as entry_error:
-                        logger.debug(f"Error processing entry {entry.entry_dn}: {entry_error}")
-                        import traceback
-                        logger.debug(traceback.format_exc())
+                    reply(pureldap.LDAPSearchResultDone(resultCode=0))
+                    return
+
+                if debug:
+                    logger.debug(f"Proxying search to AD: base={search_base}, filter={search_filter}, scope={search_scope}")
+
+                def _search(conn: Connection) -> Optional[list]:
+                    # Perform search with correct scope
+                    # Runs on a pool thread: results are fetched in pages and each
+                    # entry is handed to the reactor as soon as it is encoded, so
+                    # the client gets the first page while later ones are fetched
+                    responses = conn.extend.standard.paged_search(
+                        search_base=search_base,
+                        search_filter=search_filter,
+                        search_scope=search_scope,
+                        attributes=search_attributes,
+                        paged_size=SEARCH_PAGE_SIZE,
+                        generator=True
+                    )
 
-                conn.unbind()
+                    # Send results back. Entries are also collected for the
+                    # cache unless caching is off, the set outgrows the cache
+                    # bound, or an entry could not be encoded
+                    entry_count = 0
+                    results = [] if self.config.search_cache_ttl > 0 else None
+                    try:
+                        for response in responses:
+                            if not self.connected:
+                                # Client went away; stop paging through AD
+                                if debug:
+                                    logger.debug(f"LDAP client disconnected during search: base={search_base}")
+                                return None
+                            if response.get('type') != 'searchResEntry':
+                                continue
+                            entry_count += 1
+                            entry_dn = response['dn']
+                            try:
+                                attributes = response['attributes']
+                                raw_attributes = response['raw_attributes']
+
+                                # Debug: log if objectSid is present and its type
+                                if debug and 'objectSid' in attributes:
+                                    sid_val = attributes['objectSid']
+                                    sid_raw = raw_attributes['objectSid'][0] if raw_attributes.get('objectSid') else None
+                                    logger.debug(f"objectSid for {entry_dn}: value type={type(sid_val)}, raw type={type(sid_raw) if sid_raw else 'None'}, raw len={len(sid_raw) if sid_raw else 0}")
+
+                                # Build attributes list; attributes with no values are left out
+                                raw_get = raw_attributes.get
+                                attrs = [
+                                    (attr_name.encode('utf-8'), _encode_values(attr_name, values, raw_get(attr_name)))
+                                    for attr_name, values in attributes.items()
+                                    if values or not isinstance(values, list)
+                                ]
+
+                                result_entry = pureldap.LDAPSearchResultEntry(
+                                    objectName=entry_dn.encode('utf-8'),
+                                    attributes=attrs
+                                )
+                                reactor.callFromThread(self._relay_entry, reply, result_entry)
+                                if results is not None:
+                                    results.append(result_entry)
+                                    if len(results) > SEARCH_CACHE_MAX_RESULTS:
+                                        results = None
+                            except Exception as entry_error:
+                                results = None
+                                if debug:
+                                    logger.debug(f"Error processing entry {entry_dn}: {entry_error}", exc_info=True)
+                    except STALE_CONN_ERRORS as e:
+                        # Retrying on a fresh connection would relay entries twice
+                        if entry_count:
+                            raise _SearchInterrupted(e) from e
+                        raise
+
+                    if debug:
+                        logger.debug(f"AD returned {entry_count} entries")
+                    # paged_search doesn't raise on error result codes (busy,
+                    # sizeLimitExceeded, ...); such partial results aren't cached
+                    result_code = (conn.result or {}).get('result')
+                    if result_code != 0:
+                        logger.debug(f"AD search ended with result code {result_code}, not caching")
+                        return None
+                    return results
+
+                # Returning the Deferred keeps the reactor serving other
+                # connections while the search is in flight
+                d = defer.ensureDeferred(self._search_ad(_search, cache_key, reply))
+                d.addErrback(self._search_connection_lost)
+                return d
 
             except Exception as e:
                 logger.error(f"Error proxying search to AD: {e}")
-                import traceback
-                logger.debug(traceback.format_exc())
+                # Traceback is only formatted if a DEBUG handler emits it
+                logger.debug("Search proxy error details", exc_info=True)
 
         # Send search done
         reply(pureldap.LDAPSearchResultDone(resultCode=0))
 
+    async def _search_ad(self, search, cache_key: tuple, reply):
+        """Run a search on a pool thread, then cache it and end the response"""
+        try:
+            results = await threads.deferToThread(self.factory.run_with_ad_conn, search)
+            # None: the search is incomplete, failed, or too large to cache
+            if results is not None:
+                self.factory.cache_search(cache_key, results)
+        except Exception as e:
+            logger.error(f"Error proxying search to AD: {e}")
+            # Traceback is only formatted if a DEBUG handler emits it
+            logger.debug("Search proxy error details", exc_info=True)
+
+        # Entries were queued with callFromThread before the thread returned,
+        # so they all reach the client ahead of this
+        reply(pureldap.LDAPSearchResultDone(resultCode=0))
+
+    def _relay_entry(self, reply, result_entry):
+        """Send a search entry produced on a pool thread (reactor thread)"""
+        if self.connected:
+            reply(result_entry)
+
+    def _search_connection_lost(self, failure):
+        """Swallow the reply error when the client disconnected mid-search"""
+        failure.trap(ldapserver.LDAPServerConnectionLostException)
+        logger.debug("LDAP client disconnected before search completed")
+
     def handle_LDAPUnbindRequest(self, request, controls, reply):
         """Handle unbind request"""
         logger.debug("LDAP unbind request")
@@ -489,34 +736,34 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         - 1.3.6.1.4.1.4203.1.11.3 (Who Am I)
         - 1.3.6.1.4.1.1466.20037 (StartTLS)
         """
-        try:
-            oid = request.requestName.decode() if isinstance(request.requestName, bytes) else str(request.requestName)
-        except:
-            oid = "unknown"
+        # Compare the OID as bytes, as ldaptor decodes it, without decoding
+        oid = request.requestName
+        if not isinstance(oid, bytes):
+            oid = str(oid).encode()
 
-        logger.debug(f"LDAP extended operation: OID={oid}")
+        logger.debug(f"LDAP extended operation: OID={oid!r}")
 
         # Who Am I extended operation
-        if oid == "1.3.6.1.4.1.4203.1.11.3":
+        if oid == OID_WHOAMI:
             # Return empty authzId (anonymous) - vCenter doesn't really need this
             reply(pureldap.LDAPExtendedResponse(
                 resultCode=0,
-                responseName=b"1.3.6.1.4.1.4203.1.11.3",
+                responseName=OID_WHOAMI,
                 response=b""
             ))
             return
 
         # StartTLS - we don't support it, return unwilling to perform
-        if oid == "1.3.6.1.4.1.1466.20037":
+        if oid == OID_STARTTLS:
             logger.debug("StartTLS requested but not supported")
             reply(pureldap.LDAPExtendedResponse(
                 resultCode=53,  # Unwilling to perform
-                errorMessage=b"StartTLS not supported"
+                errorMessage=ERR_STARTTLS
             ))
             return
 
         # For other extended operations, return success with empty response
-        logger.debug(f"Unknown extended operation {oid}, returning success")
+        logger.debug(f"Unknown extended operation {oid!r}, returning success")
         reply(pureldap.LDAPExtendedResponse(
             resultCode=0,
             response=b""
@@ -525,9 +772,10 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
     def handle_LDAPCompareRequest(self, request, controls, reply):
         """Handle LDAP compare request by proxying to AD"""
         try:
-            dn = request.entry.decode() if isinstance(request.entry, bytes) else str(request.entry)
-            attr = request.ava.attributeDesc.decode() if isinstance(request.ava.attributeDesc, bytes) else str(request.ava.attributeDesc)
-            val = request.ava.assertionValue.decode() if isinstance(request.ava.assertionValue, bytes) else str(request.ava.assertionValue)
+            dn = self._to_text(request.entry)
+            # ldaptor wraps these in LDAPString-like objects; read .value
+            attr = self._get_bytes_value(request.ava.attributeDesc)
+            val = self._get_bytes_value(request.ava.assertionValue)
         except:
             dn, attr, val = "unknown", "unknown", "unknown"
 
@@ -536,19 +784,10 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         # Proxy compare to real AD
         if self.ad_config:
             try:
-                from ldap3 import Server, Connection, ALL
-
-                server = Server(self.ad_config.host, port=self.ad_config.port, get_info=ALL)
-                conn = Connection(
-                    server,
-                    user=self.ad_config.bind_dn,
-                    password=self.ad_config.bind_password,
-                    auto_bind=True
+                result = self.factory.run_with_ad_conn(
+                    lambda conn: conn.compare(dn, attr, val)
                 )
 
-                result = conn.compare(dn, attr, val)
-                conn.unbind()
-
                 if result:
                     reply(pureldap.LDAPCompareResponse(resultCode=6))  # compareTrue
                 else:
@@ -570,7 +809,7 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         logger.debug("LDAP modify request - not supported")
         reply(pureldap.LDAPModifyResponse(
             resultCode=53,  # Unwilling to perform
-            errorMessage=b"Modify operations not supported by proxy"
+            errorMessage=ERR_MODIFY
         ))
 
     def handle_LDAPAddRequest(self, request, controls, reply):
@@ -578,7 +817,7 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         logger.debug("LDAP add request - not supported")
         reply(pureldap.LDAPAddResponse(
             resultCode=53,  # Unwilling to perform
-            errorMessage=b"Add operations not supported by proxy"
+            errorMessage=ERR_ADD
         ))
 
     def handle_LDAPDelRequest(self, request, controls, reply):
@@ -586,7 +825,7 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         logger.debug("LDAP delete request - not supported")
         reply(pureldap.LDAPDelResponse(
             resultCode=53,  # Unwilling to perform
-            errorMessage=b"Delete operations not supported by proxy"
+            errorMessage=ERR_DELETE
         ))
 
     def handle_LDAPModifyDNRequest(self, request, controls, reply):
@@ -595,7 +834,7 @@ class WorldPostaLDAPServer(ldapserver.LDAPServer):
         # ModifyDNResponse uses same structure as other responses
         reply(pureldap.LDAPModifyDNResponse(
             resultCode=53,  # Unwilling to perform
-            errorMessage=b"Modify DN operations not supported by proxy"
+            errorMessage=ERR_MODIFY_DN
         ))
 
 
@@ -609,16 +848,206 @@ class LDAPServerFactory(protocol.ServerFactory):
         self.api_config = api_config
         self.service_name = service_name
 
+        # Shared AD server and a pool of service-account connections, so
+        # proxied operations skip the TCP connect + bind. Schema info is
+        # not fetched; attribute values are passed through as returned.
+        self._ad_server: Optional[Server] = None
+        if ad_config:
+            self._ad_server = Server(
+                ad_config.host,
+                port=ad_config.port,
+                use_ssl=ad_config.use_ssl,
+                get_info=NONE,
+                connect_timeout=10
+            )
+        self._ad_pool: "queue.Queue[Connection]" = queue.Queue()
+        # Locally answered RootDSE entry, if naming contexts are configured
+        self.root_dse: Optional[pureldap.LDAPSearchResultEntry] = None
+        if config.naming_contexts:
+            contexts = [nc.encode('utf-8') for nc in config.naming_contexts]
+            self.root_dse = pureldap.LDAPSearchResultEntry(
+                objectName=b"",
+                attributes=[
+                    (b"namingContexts", contexts),
+                    (b"defaultNamingContext", contexts[:1]),
+                    *ROOT_DSE_STATIC_ATTRIBUTES
+                ]
+            )
+
+        # (base, filter, scope, attributes) -> (result entries, time cached)
+        self._search_cache: Dict[tuple, Tuple[list, float]] = {}
+
+        # 2FA exemption lookups, lowercased once here instead of per bind.
+        # exempt_exact / exempt_upn_users map back to the configured entry
+        # for log messages; exempt_suffixes lines up with config.exempt_ous.
+        self.service_dn = ""
+        self.service_upn_user = None
+        if ad_config and ad_config.bind_dn:
+            self.service_dn = ad_config.bind_dn.lower()
+            if "@" in self.service_dn:
+                self.service_upn_user = self.service_dn.partition("@")[0]
+        self.exempt_exact: Dict[str, str] = {}
+        self.exempt_upn_users: Dict[str, str] = {}
+        for exempt_dn in reversed(config.exempt_ous):
+            exempt_lower = exempt_dn.lower()
+            self.exempt_exact[exempt_lower] = exempt_dn
+            if "@" in exempt_lower:
+                self.exempt_upn_users[exempt_lower.partition("@")[0]] = exempt_dn
+        self.exempt_suffixes: Tuple[str, ...] = tuple(
+            "," + exempt_dn.lower() for exempt_dn in config.exempt_ous
+        )
+
+        # One auth engine and asyncio loop for all binds. The loop runs in
+        # its own thread for the life of the factory, so the WorldPosta API
+        # client's connection pool and TLS sessions survive between binds.
+        self.auth_engine = AuthEngine(
+            ad_config=ad_config,
+            api_config=api_config,
+            service_name=service_name
+        )
+        # Primary auth + push send + push wait, with some slack
+        self.auth_timeout = api_config.push_timeout + 30
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self.loop.run_forever,
+            name="ldap-auth-loop",
+            daemon=True
+        )
+        self._loop_thread.start()
+
+    def _open_ad_conn(self) -> Connection:
+        """Open a new connection bound as the service account"""
+        conn = Connection(
+            self._ad_server,
+            user=self.ad_config.bind_dn,
+            password=self.ad_config.bind_password
+        )
+        if not conn.bind():
+            raise LDAPBindError(f"Service account bind failed: {conn.result}")
+        return conn
+
+    def run_with_ad_conn(self, operation: Callable[[Connection], Any]) -> Any:
+        """
+        Run an operation on a pooled service-account connection
+
+        AD closes connections left idle longer than MaxConnIdleTime, so a
+        pooled connection can be dead when it is reused. If it fails with a
+        communication error it is discarded and the operation is retried once
+        on a new connection, as ADClient._get_user_dn does.
+
+        Args:
+            operation: Called with a bound connection
+
+        Returns:
+            Whatever operation returns
+        """
+        try:
+            conn = self._ad_pool.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is not None:
+            try:
+                return self._run_on_ad_conn(conn, operation)
+            except STALE_CONN_ERRORS:
+                logger.debug("Pooled AD connection lost, reconnecting")
+        return self._run_on_ad_conn(self._open_ad_conn(), operation)
+
+    def _run_on_ad_conn(self, conn: Connection, operation: Callable[[Connection], Any]) -> Any:
+        """Run operation on conn, then pool the connection or close it on error"""
+        try:
+            result = operation(conn)
+        except Exception:
+            self.release_ad_conn(conn, reusable=False)
+            raise
+        self.release_ad_conn(conn)
+        return result
+
+    def release_ad_conn(self, conn: Connection, reusable: bool = True):
+        """Return a connection to the pool, or close it if it is unusable"""
+        if reusable and conn.bound and not conn.closed:
+            self._ad_pool.put_nowait(conn)
+            return
+        try:
+            conn.unbind()
+        except Exception:
+            pass
+
+    def verify_ad_bind(self, dn: str, password: str) -> bool:
+        """
+        Check a DN/password against AD using a pooled connection
+
+        The connection is rebound as the user and then back to the service
+        account before it is returned to the pool; if that second rebind
+        fails the connection is left unbound and gets closed instead.
+        """
+        def _verify(conn: Connection) -> bool:
+            valid = conn.rebind(user=dn, password=password)
+            conn.rebind(
+                user=self.ad_config.bind_dn,
+                password=self.ad_config.bind_password
+            )
+            return valid
+
+        return self.run_with_ad_conn(_verify)
+
+    def get_cached_search(self, key: tuple) -> Optional[list]:
+        """Return cached result entries for a search, or None on miss/expiry"""
+        ttl = self.config.search_cache_ttl
+        if ttl <= 0:
+            return None
+        cached = self._search_cache.get(key)
+        if cached and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+        return None
+
+    def cache_search(self, key: tuple, entries: list):
+        """Store search result entries, purging expired queries when full"""
+        ttl = self.config.search_cache_ttl
+        if ttl <= 0 or len(entries) > SEARCH_CACHE_MAX_RESULTS:
+            return
+        now = time.monotonic()
+        if len(self._search_cache) >= SEARCH_CACHE_MAX_ENTRIES:
+            self._search_cache = {
+                k: cached for k, cached in self._search_cache.items()
+                if now - cached[1] < ttl
+            }
+            if len(self._search_cache) >= SEARCH_CACHE_MAX_ENTRIES:
+                self._search_cache.clear()
+        self._search_cache[key] = (entries, now)
+
     def buildProtocol(self, addr):
         logger.debug(f"New LDAP connection from {addr}")
         proto = WorldPostaLDAPServer(
             config=self.config,
             ad_config=self.ad_config,
             api_config=self.api_config,
-            service_name=self.service_name
+            service_name=self.service_name,
+            auth_engine=self.auth_engine
         )
+        proto.factory = self
         return proto
 
+    def close_ad_pool(self):
+        """Unbind all pooled AD connections"""
+        while True:
+            try:
+                conn = self._ad_pool.get_nowait()
+            except queue.Empty:
+                break
+            self.release_ad_conn(conn, reusable=False)
+
+    def stop(self):
+        """Close the auth engine, stop its event loop and release AD connections"""
+        if self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self.auth_engine.close(), self.loop
+                ).result(timeout=10)
+            except Exception as e:
+                logger.warning(f"Error closing LDAP auth engine: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.close_ad_pool()
+
 
 class LDAPServer:
     """
@@ -645,6 +1074,8 @@ class LDAPServer:
             service_name=self.service_name
         )
 
+        reactor.addSystemEventTrigger("before", "shutdown", factory.stop)
+
         self._endpoint = TCP4ServerEndpoint(reactor, self.config.port)
         d = self._endpoint.listen(factory)
         d.addCallback(self._on_listening)
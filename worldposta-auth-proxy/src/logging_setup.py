@@ -3,10 +3,15 @@ WorldPosta Authentication Proxy - Logging Setup
 """
 
 import os
+import queue
+import atexit
 import logging
 import logging.handlers
 from typing import Optional
 
+# Background thread that writes queued log records to the real handlers
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
 
 def setup_logging(
     log_level: str = "INFO",
@@ -16,11 +21,17 @@ def setup_logging(
     """
     Configure logging for the authentication proxy
 
+    Loggers only put records on an in-memory queue; console and file output
+    (including log rotation) happens on a background listener thread, so
+    request handling never waits on disk I/O. The listener is flushed and
+    stopped at interpreter exit.
+
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
         log_file: Path to log file (None for stdout only)
         debug: Enable debug mode with verbose output
     """
+    global _queue_listener
 
     if debug:
         log_level = "DEBUG"
@@ -38,7 +49,7 @@ def setup_logging(
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # File handler (if log_file specified)
     if log_file:
@@ -54,10 +65,28 @@ def setup_logging(
             backupCount=5
         )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Route all records through a queue to the listener thread
+    shutdown_logging()
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
+    atexit.register(shutdown_logging)
 
     # Log startup message
     logger = logging.getLogger(__name__)
     logger.info(f"Logging initialized (level={log_level}, file={log_file})")
 
     return root_logger
+
+
+def shutdown_logging():
+    """Flush queued log records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
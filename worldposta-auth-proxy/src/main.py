@@ -10,18 +10,22 @@ import asyncio
 import signal
 import sys
 import logging
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 from . import __version__
 from .config import load_config, ProxyConfig
 from .logging_setup import setup_logging
-from .api import WorldPostaClient
+from .api import WorldPostaClient, check_crypto_backend
 from .auth import AuthEngine
 from .radius import RADIUSServer
 from .ldap import LDAPServer
 
 logger = logging.getLogger(__name__)
 
+# Worker threads for blocking AD (ldap3) calls made from the event loop
+AD_EXECUTOR_WORKERS = 32
+
 
 class AuthProxy:
     """
@@ -33,10 +37,27 @@ class AuthProxy:
         self.radius_servers: List[RADIUSServer] = []
         self.ldap_servers = []  # TODO: Implement LDAP server
         self.running = False
+        # Set by request_stop(); start() returns once it is set. Created in
+        # start() so it belongs to the running loop (Python < 3.10 binds an
+        # Event to the current loop at construction)
+        self._stop_event: Optional[asyncio.Event] = None
+        self._stop_requested = False
 
     async def start(self):
         """Start all configured servers"""
         logger.info(f"WorldPosta Authentication Proxy v{__version__} starting...")
+        self._stop_event = asyncio.Event()
+        if self._stop_requested:
+            self._stop_event.set()
+        check_crypto_backend()
+
+        # One API client for all RADIUS servers so they share a connection pool
+        api_client = WorldPostaClient(
+            endpoint=self.config.api.endpoint,
+            integration_key=self.config.api.integration_key,
+            secret_key=self.config.api.secret_key,
+            timeout=self.config.api.push_timeout
+        )
 
         # Create auth engines and servers for each RADIUS server config
         for name, server_config in self.config.radius_servers.items():
@@ -53,7 +74,8 @@ class AuthProxy:
             auth_engine = AuthEngine(
                 ad_config=ad_config,
                 api_config=self.config.api,
-                service_name="VPN Authentication"
+                service_name="VPN Authentication",
+                api_client=api_client
             )
 
             # Create RADIUS server
@@ -100,17 +122,36 @@ class AuthProxy:
             self._twisted_thread.start()
             logger.info("LDAP servers started in background thread")
 
-        # Start all RADIUS servers
-        tasks = []
-        for server in self.radius_servers:
-            tasks.append(asyncio.create_task(server.start()))
+        # Serve until shutdown is requested. A RADIUS server that fails
+        # (e.g. port already in use) cancels the group and its error
+        # propagates out of start()
+        if hasattr(asyncio, "TaskGroup"):
+            async with asyncio.TaskGroup() as tg:
+                for server in self.radius_servers:
+                    tg.create_task(server.start())
+                tg.create_task(self._stop_when_requested())
+        else:
+            # Python < 3.11
+            await asyncio.gather(
+                *(server.start() for server in self.radius_servers),
+                self._stop_when_requested()
+            )
+
+    async def _stop_when_requested(self):
+        """Wait for request_stop(), then stop all servers"""
+        await self._stop_event.wait()
+        await self.stop()
 
-        # Wait for all RADIUS servers
-        if tasks:
-            await asyncio.gather(*tasks)
+    def request_stop(self):
+        """Ask start() to shut everything down and return"""
+        self._stop_requested = True
+        if self._stop_event is not None:
+            self._stop_event.set()
 
     async def stop(self):
         """Stop all servers"""
+        if not self.running:
+            return
         logger.info("Stopping authentication proxy...")
         self.running = False
 
@@ -135,7 +176,7 @@ def setup_signal_handlers(proxy: AuthProxy, loop: asyncio.AbstractEventLoop):
 
     def signal_handler():
         logger.info("Received shutdown signal")
-        asyncio.create_task(proxy.stop())
+        proxy.request_stop()
 
     for sig in (signal.SIGTERM, signal.SIGINT):
         loop.add_signal_handler(sig, signal_handler)
@@ -187,16 +228,8 @@ Examples:
         print(f"Configuration error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Setup logging
-    setup_logging(
-        log_level=config.main.log_level,
-        log_file=config.main.log_file,
-        debug=args.debug
-    )
-
-    # Test config mode
+    # Test config mode: print a summary and exit without setting up logging
     if args.test_config:
-        logger.info("Configuration is valid")
         print("Configuration is valid")
 
         # Print summary
@@ -214,12 +247,20 @@ Examples:
 
         sys.exit(0)
 
+    # Setup logging
+    setup_logging(
+        log_level=config.main.log_level,
+        log_file=config.main.log_file,
+        debug=args.debug
+    )
+
     # Create and run proxy
     proxy = AuthProxy(config)
 
     # Create event loop
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=AD_EXECUTOR_WORKERS))
 
     # Setup signal handlers
     setup_signal_handlers(proxy, loop)
@@ -3,18 +3,21 @@ WorldPosta Authentication Proxy - RADIUS Server
 Handles RADIUS authentication requests from VPNs, firewalls, etc.
 """
 
+import io
 import logging
 import asyncio
+import functools
+import hashlib
 import socket
+import struct
 import time
-import hashlib
+from collections import OrderedDict
 from typing import Dict, Optional, Tuple
-from dataclasses import dataclass
 
-from pyrad import dictionary, packet, server
-from pyrad.packet import AccessRequest, AccessAccept, AccessReject, AccessChallenge
+from pyrad import dictionary, packet
+from pyrad.packet import AccessRequest, AccessAccept, AccessReject
 
-from ..config import RADIUSServerConfig, RADIUSClient
+from ..config import RADIUSServerConfig
 from ..auth.engine import AuthEngine, AuthResult
 
 logger = logging.getLogger(__name__)
@@ -34,13 +37,88 @@ ATTRIBUTE   Calling-Station-Id  31  string
 ATTRIBUTE   NAS-Identifier  32  string
 """
 
+# Seconds between sweeps of stale pending requests
+PENDING_CLEANUP_INTERVAL = 30
+
+# RFC 2865 packet size limits
+RADIUS_HEADER_LENGTH = 20
+RADIUS_MAX_PACKET_LENGTH = 4096
+
+# Attribute codes read from Access-Requests
+ATTR_USER_NAME = 1
+ATTR_USER_PASSWORD = 2
+ATTR_NAS_IP_ADDRESS = 4
+ATTR_CALLING_STATION_ID = 31
+ATTR_REPLY_MESSAGE = 18
+
+# Reply-Message sent with every Access-Accept
+SUCCESS_REPLY_MESSAGE = b"Authentication successful"
+
+# Largest value that fits in one attribute (255 minus type and length octets)
+MAX_ATTRIBUTE_VALUE_LENGTH = 253
+
+# Replies kept for answering retransmits of already-answered requests
+RECENT_RESPONSES_MAX = 4096
+
+# Codes a NAS may send to a server: Access-Request, Accounting-Request,
+# Status-Server and Status-Client
+RADIUS_REQUEST_CODES = frozenset((1, 4, 12, 13))
+
+# Parsed once and shared by every RADIUSServer instance
+SHARED_DICT = dictionary.Dictionary(io.StringIO(RADIUS_DICT))
+
+
+def _build_reply(
+    code: int,
+    identifier: int,
+    request_authenticator: bytes,
+    secret: bytes,
+    message: bytes
+) -> bytes:
+    """
+    Encode a reply packet carrying a Reply-Message
+
+    Args:
+        code: Reply code (Access-Accept, Access-Reject, ...)
+        identifier: Identifier of the request being answered
+        request_authenticator: Authenticator of the request being answered
+        secret: Shared secret
+        message: Reply-Message text, split over several attributes if long
+
+    Returns:
+        Reply packet bytes with the Response Authenticator (RFC 2865, section 3)
+    """
+    attrs = bytearray()
+    for start in range(0, len(message), MAX_ATTRIBUTE_VALUE_LENGTH):
+        chunk = message[start:start + MAX_ATTRIBUTE_VALUE_LENGTH]
+        attrs += bytes((ATTR_REPLY_MESSAGE, len(chunk) + 2))
+        attrs += chunk
+
+    header = struct.pack("!BBH", code, identifier, RADIUS_HEADER_LENGTH + len(attrs))
+    authenticator = hashlib.md5(header + request_authenticator + attrs + secret).digest()
+    return header + authenticator + attrs
 
-@dataclass
-class PendingRequest:
-    """Track pending requests for duplicate detection"""
-    timestamp: float
-    identifier: int
-    source: Tuple[str, int]
+
+class RADIUSProtocol(asyncio.DatagramProtocol):
+    """
+    UDP protocol feeding datagrams from the event loop into a RADIUSServer
+    """
+
+    def __init__(self, server: "RADIUSServer"):
+        self.server = server
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]):
+        # Retransmits are answered inline; anything else is handled in background
+        if not self.server._handle_retransmit(data, addr):
+            asyncio.create_task(self.server._process_and_respond(data, addr))
+
+    def error_received(self, exc: Exception):
+        if self.server.running:
+            logger.error(f"Socket error on RADIUS port {self.server.config.port}: {exc}")
 
 
 class RADIUSServer:
@@ -62,30 +140,35 @@ class RADIUSServer:
         self.config = config
         self.auth_engine = auth_engine
         self.service_name = service_name
+        # The mode never changes for a server, so bind it once
+        self._authenticate = functools.partial(auth_engine.authenticate, mode=config.mode)
 
         # Build client lookup table
-        self.clients: Dict[str, str] = {}  # IP -> secret
-        for client in config.clients:
-            self.clients[client.ip] = client.secret
-
-        # Pending requests for duplicate detection
-        self.pending: Dict[str, PendingRequest] = {}
-        self.pending_lock = asyncio.Lock()
-
-        # Socket
-        self.socket: Optional[socket.socket] = None
+        # Secrets are encoded once here rather than for every packet
+        self.clients: Dict[str, bytes] = {  # IP -> secret
+            client.ip: client.secret.encode() for client in config.clients
+        }
+
+        # Pending requests for duplicate detection: key -> time marked
+        # Only touched from the event loop thread, so no lock is needed
+        self.pending: Dict[Tuple[str, int, int], float] = {}
+
+        # Replies already sent, keyed by (ip, port, identifier, authenticator),
+        # so a retransmit after a lost reply doesn't trigger a second push
+        self.recent_responses: "OrderedDict[Tuple[str, int, int, bytes], bytes]" = OrderedDict()
+
+        # UDP transport, created in start()
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.protocol: Optional[RADIUSProtocol] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._cleanup_task: Optional[asyncio.Task] = None
         self.running = False
 
-        # Load RADIUS dictionary
-        self.dict = dictionary.Dictionary()
-        for line in RADIUS_DICT.strip().split("\n"):
-            parts = line.split()
-            if parts[0] == "ATTRIBUTE":
-                self.dict.attributes[parts[1]] = (int(parts[2]), parts[3])
+        # Bound on requests being processed at once; extra packets are dropped
+        self.inflight = asyncio.Semaphore(config.max_concurrent)
 
-    def _get_client_secret(self, client_ip: str) -> Optional[str]:
-        """Get shared secret for client IP"""
-        return self.clients.get(client_ip)
+        # RADIUS dictionary
+        self.dict = SHARED_DICT
 
     def _is_duplicate(self, identifier: int, source: Tuple[str, int]) -> bool:
         """
@@ -94,47 +177,97 @@ class RADIUSServer:
         RADIUS clients may retransmit if they don't get a response quickly.
         We need to detect and ignore duplicates during push wait.
         """
-        key = f"{source[0]}:{source[1]}:{identifier}"
+        key = (source[0], source[1], identifier)
         return key in self.pending
 
-    async def _mark_pending(self, identifier: int, source: Tuple[str, int]):
+    def _handle_retransmit(self, data: bytes, source: Tuple[str, int]) -> bool:
+        """
+        Deal with a retransmitted request without starting a task
+
+        Works on the raw header, so no parsing or authentication is done.
+
+        Args:
+            data: Raw datagram
+            source: (IP, port) of client
+
+        Returns:
+            True if the datagram was a retransmit and has been handled
+        """
+        if len(data) < RADIUS_HEADER_LENGTH:
+            return False
+
+        # Already answered (reply lost in flight): resend the same reply
+        key = (source[0], source[1], data[1], data[4:20])
+        response = self.recent_responses.get(key)
+        if response:
+            logger.debug(f"Resending cached reply to {source}")
+            self.recent_responses.move_to_end(key)
+            self.transport.sendto(response, source)
+            return True
+
+        # Still being processed (e.g. waiting on a push): ignore it
+        if self._is_duplicate(data[1], source):
+            logger.debug(f"Ignoring duplicate request from {source}")
+            return True
+
+        return False
+
+    def _mark_pending(self, identifier: int, source: Tuple[str, int]):
         """Mark request as pending"""
-        key = f"{source[0]}:{source[1]}:{identifier}"
-        async with self.pending_lock:
-            self.pending[key] = PendingRequest(
-                timestamp=time.time(),
-                identifier=identifier,
-                source=source
-            )
+        key = (source[0], source[1], identifier)
+        self.pending[key] = time.time()
 
-    async def _clear_pending(self, identifier: int, source: Tuple[str, int]):
+    def _clear_pending(self, identifier: int, source: Tuple[str, int]):
         """Clear pending request"""
-        key = f"{source[0]}:{source[1]}:{identifier}"
-        async with self.pending_lock:
-            self.pending.pop(key, None)
+        key = (source[0], source[1], identifier)
+        self.pending.pop(key, None)
+
+    def _remember_response(self, pkt: packet.Packet, source: Tuple[str, int], response: bytes):
+        """Keep a sent reply so retransmits of the request get the same answer"""
+        key = (source[0], source[1], pkt.id, bytes(pkt.authenticator))
+        self.recent_responses[key] = response
+        if len(self.recent_responses) > RECENT_RESPONSES_MAX:
+            self.recent_responses.popitem(last=False)
 
-    async def _cleanup_pending(self):
+    def _cleanup_pending(self):
         """Clean up old pending requests"""
         now = time.time()
-        async with self.pending_lock:
-            expired = [
-                key for key, req in self.pending.items()
-                if now - req.timestamp > 120  # 2 minute timeout
-            ]
-            for key in expired:
-                del self.pending[key]
+        expired = [
+            key for key, marked_at in self.pending.items()
+            if now - marked_at > 120  # 2 minute timeout
+        ]
+        for key in expired:
+            del self.pending[key]
+
+    async def _pending_cleanup_loop(self):
+        """Periodically drop pending requests that were never cleared"""
+        while self.running:
+            await asyncio.sleep(PENDING_CLEANUP_INTERVAL)
+            self._cleanup_pending()
 
     def _parse_packet(
         self,
         data: bytes,
         source: Tuple[str, int],
-        secret: str
-    ) -> Optional[packet.Packet]:
+        secret: bytes
+    ) -> Optional[packet.AuthPacket]:
         """Parse incoming RADIUS packet"""
+        # Reject truncated or junk datagrams before pyrad does any work
+        if len(data) < RADIUS_HEADER_LENGTH or data[0] not in RADIUS_REQUEST_CODES:
+            logger.debug(f"Ignoring malformed RADIUS packet from {source}")
+            return None
+        pkt_len = int.from_bytes(data[2:4], "big")
+        if not RADIUS_HEADER_LENGTH <= pkt_len <= min(len(data), RADIUS_MAX_PACKET_LENGTH):
+            logger.debug(f"Ignoring RADIUS packet with bad length {pkt_len} from {source}")
+            return None
+        # Octets beyond the Length field are padding (RFC 2865, section 3)
+        if pkt_len < len(data):
+            data = data[:pkt_len]
+
         try:
-            pkt = packet.Packet(
+            pkt = packet.AuthPacket(
                 packet=data,
-                secret=secret.encode(),
+                secret=secret,
                 dict=self.dict
             )
             return pkt
@@ -144,26 +277,43 @@ class RADIUSServer:
 
     def _create_response(
         self,
-        request: packet.Packet,
+        request: packet.AuthPacket,
         code: int,
-        secret: str,
-        attributes: Optional[Dict] = None
+        secret: bytes,
+        message: bytes
     ) -> bytes:
         """Create RADIUS response packet"""
-        reply = request.CreateReply(packet=None)
-        reply.code = code
+        return _build_reply(code, request.id, request.authenticator, secret, message)
+
+    @staticmethod
+    def _extract_attrs(pkt: packet.AuthPacket) -> Tuple[str, str, str, str]:
+        """
+        Pull the attributes we need out of an Access-Request in one pass
 
-        if attributes:
-            for key, value in attributes.items():
-                reply[key] = value
+        Args:
+            pkt: Parsed Access-Request
 
-        return reply.ReplyPacket()
+        Returns:
+            (username, password, nas_ip, calling_station), empty when absent
+        """
+        username = password = nas_ip = calling_station = ""
+        for code, values in pkt.items():
+            if code == ATTR_USER_NAME:
+                username = values[0].decode("utf-8", errors="replace")
+            elif code == ATTR_USER_PASSWORD:
+                password = pkt.PwDecrypt(values[0])
+            elif code == ATTR_NAS_IP_ADDRESS:
+                if len(values[0]) == 4:
+                    nas_ip = socket.inet_ntoa(values[0])
+            elif code == ATTR_CALLING_STATION_ID:
+                calling_station = values[0].decode("utf-8", errors="replace")
+        return username, password, nas_ip, calling_station
 
     async def _handle_auth_request(
         self,
-        pkt: packet.Packet,
+        pkt: packet.AuthPacket,
         source: Tuple[str, int],
-        secret: str
+        secret: bytes
     ) -> bytes:
         """
         Handle Access-Request packet
@@ -176,55 +326,44 @@ class RADIUSServer:
         Returns:
             Response packet bytes
         """
-        # Extract attributes
-        username = pkt.get("User-Name", [b""])[0]
-        if isinstance(username, bytes):
-            username = username.decode()
-
-        password = pkt.get("User-Password", [b""])[0]
-        if isinstance(password, bytes):
-            password = password.decode()
-
-        nas_ip = pkt.get("NAS-IP-Address", [""])[0]
-        calling_station = pkt.get("Calling-Station-Id", [b""])[0]
-        if isinstance(calling_station, bytes):
-            calling_station = calling_station.decode()
+        username, password, nas_ip, calling_station = self._extract_attrs(pkt)
 
         logger.info(f"Access-Request from {source[0]}: user={username}, nas={nas_ip}")
 
-        # Check for duplicate
+        # Check for duplicate (a retransmit that arrived before this request
+        # was marked pending; later ones are caught by _handle_retransmit)
         if self._is_duplicate(pkt.id, source):
             logger.debug(f"Ignoring duplicate request from {source}")
             return b""  # Don't respond to duplicates during push wait
 
         # Mark as pending
-        await self._mark_pending(pkt.id, source)
+        self._mark_pending(pkt.id, source)
 
         try:
             # Perform authentication
-            result, message = await self.auth_engine.authenticate(
+            result, message = await self._authenticate(
                 username=username,
                 password=password,
                 device_info=f"NAS: {nas_ip}",
-                ip_address=calling_station or source[0],
-                mode=self.config.mode
+                ip_address=calling_station or source[0]
             )
 
             if result == AuthResult.SUCCESS:
                 logger.info(f"Access-Accept for user: {username}")
-                return self._create_response(
-                    pkt, AccessAccept, secret,
-                    {"Reply-Message": "Authentication successful"}
+                response = self._create_response(
+                    pkt, AccessAccept, secret, SUCCESS_REPLY_MESSAGE
                 )
             else:
                 logger.warning(f"Access-Reject for user: {username} - {message}")
-                return self._create_response(
-                    pkt, AccessReject, secret,
-                    {"Reply-Message": message}
+                response = self._create_response(
+                    pkt, AccessReject, secret, message.encode()
                 )
 
+            self._remember_response(pkt, source, response)
+            return response
+
         finally:
-            await self._clear_pending(pkt.id, source)
+            self._clear_pending(pkt.id, source)
 
     async def _handle_packet(
         self,
@@ -232,12 +371,10 @@ class RADIUSServer:
         source: Tuple[str, int]
     ) -> Optional[bytes]:
         """Handle incoming RADIUS packet"""
-        client_ip = source[0]
-
         # Get shared secret for this client
-        secret = self._get_client_secret(client_ip)
+        secret = self.clients.get(source[0])
         if not secret:
-            logger.warning(f"Unknown RADIUS client: {client_ip}")
+            logger.warning(f"Unknown RADIUS client: {source[0]}")
             return None
 
         # Parse packet
@@ -252,62 +389,55 @@ class RADIUSServer:
             logger.warning(f"Unsupported RADIUS packet code: {pkt.code}")
             return None
 
-    async def _receive_loop(self):
-        """Main receive loop"""
-        loop = asyncio.get_event_loop()
+    async def _process_and_respond(self, data: bytes, source: Tuple[str, int]):
+        """Process packet and send response"""
+        if self.inflight.locked():
+            logger.warning(
+                f"Dropping RADIUS packet from {source}: "
+                f"{self.config.max_concurrent} requests already in flight"
+            )
+            return
 
-        while self.running:
+        async with self.inflight:
             try:
-                # Receive packet (socket has 1 second timeout)
-                data, source = await loop.run_in_executor(
-                    None, self.socket.recvfrom, 4096
-                )
-
-                # Handle packet in background
-                asyncio.create_task(self._process_and_respond(data, source))
-
-            except socket.timeout:
-                # Socket timeout - check if we should keep running
-                continue
-            except OSError as e:
-                if self.running and e.errno not in (11, 35):  # EAGAIN, EWOULDBLOCK
-                    logger.error(f"Socket error in receive loop: {e}")
+                response = await self._handle_packet(data, source)
+                if response:
+                    self.transport.sendto(response, source)
             except Exception as e:
-                if self.running:
-                    logger.error(f"Error in receive loop: {e}")
-
-    async def _process_and_respond(self, data: bytes, source: Tuple[str, int]):
-        """Process packet and send response"""
-        try:
-            response = await self._handle_packet(data, source)
-            if response:
-                self.socket.sendto(response, source)
-        except Exception as e:
-            logger.error(f"Error processing packet from {source}: {e}")
+                logger.error(f"Error processing packet from {source}: {e}")
 
     async def start(self):
-        """Start the RADIUS server"""
+        """Start the RADIUS server and serve until stop() is called"""
         logger.info(f"Starting RADIUS server on port {self.config.port}")
 
-        # Create UDP socket
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.socket.bind(("0.0.0.0", self.config.port))
-        # Keep socket blocking - we use run_in_executor with timeout
-        self.socket.settimeout(1.0)  # 1 second timeout for graceful shutdown
+        # Datagrams are delivered straight from the event loop's selector
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            lambda: RADIUSProtocol(self),
+            local_addr=("0.0.0.0", self.config.port)
+        )
 
         self.running = True
+        self._cleanup_task = asyncio.create_task(self._pending_cleanup_loop())
 
         # Log configured clients
         for ip in self.clients.keys():
             logger.info(f"RADIUS client configured: {ip}")
 
-        # Start receive loop
-        await self._receive_loop()
+        await self._stopped.wait()
 
     async def stop(self):
         """Stop the RADIUS server"""
         logger.info("Stopping RADIUS server")
         self.running = False
-        if self.socket:
-            self.socket.close()
+        if self._cleanup_task:
+            self._cleanup_task.cancel()
+            try:
+                await self._cleanup_task
+            except asyncio.CancelledError:
+                pass
+        if self.transport:
+            self.transport.close()
+        if self._stopped:
+            self._stopped.set()